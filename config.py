@@ -3,7 +3,11 @@ Central configuration for fraud detection MLOps pipeline
 """
 
 import os
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,60 +21,329 @@ NEO4J_BACKUP_DIR = DATA_DIR / "neo4j_backups"
 OUTPUTS_DIR = PROJECT_ROOT / "outputs"
 MODELS_DIR = PROJECT_ROOT / "models"
 
-# Ensure directories exist
-for directory in [
-    RAW_DATA_DIR,
-    PROCESSED_DATA_DIR,
-    NEO4J_BACKUP_DIR,
-    OUTPUTS_DIR,
-    MODELS_DIR,
-]:
-    directory.mkdir(parents=True, exist_ok=True)
-
-# Dataset generation parameters
-SEED = int(os.getenv("SEED", "42"))
-N_USERS = int(os.getenv("N_USERS", "200"))
-N_TRANSACTIONS = int(os.getenv("N_TRANSACTIONS", "1000"))
-FRAUD_RATE = float(os.getenv("FRAUD_RATE", "0.15"))
-
-# Data versioning
-DATA_VERSION = os.getenv("DATA_VERSION", "v1.0")
-
-# Neo4j configuration
-NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "fraud_detection_2024")
-
-# MLflow configuration
-MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
-MLFLOW_EXPERIMENT_NAME = os.getenv("MLFLOW_EXPERIMENT_NAME", "fraud-detection")
-MLFLOW_ARTIFACT_ROOT = os.getenv("MLFLOW_ARTIFACT_ROOT", str(MODELS_DIR))
-
-# Model parameters
-RISK_THRESHOLD = float(os.getenv("RISK_THRESHOLD", "0.15"))
-
-# Risk score weights
-DEVICE_RISK_WEIGHT = float(os.getenv("DEVICE_RISK_WEIGHT", "0.35"))
-AGE_RISK_WEIGHT = float(os.getenv("AGE_RISK_WEIGHT", "0.25"))
-AMOUNT_RISK_WEIGHT = float(os.getenv("AMOUNT_RISK_WEIGHT", "0.20"))
-VOLUME_RISK_WEIGHT = float(os.getenv("VOLUME_RISK_WEIGHT", "0.10"))
-CENTRALITY_RISK_WEIGHT = float(os.getenv("CENTRALITY_RISK_WEIGHT", "0.10"))
-
-# Target metrics
-TARGET_PRECISION_MIN = float(os.getenv("TARGET_PRECISION_MIN", "0.8"))
-TARGET_PRECISION_MAX = float(os.getenv("TARGET_PRECISION_MAX", "0.9"))
-TARGET_RECALL_MIN = float(os.getenv("TARGET_RECALL_MIN", "0.95"))  # Maximize recall
-
-# Monitoring configuration
-PROMETHEUS_PORT = int(os.getenv("PROMETHEUS_PORT", "8001"))
-METRICS_UPDATE_INTERVAL = int(os.getenv("METRICS_UPDATE_INTERVAL", "60"))  # seconds
-
-# API configuration
-API_HOST = os.getenv("API_HOST", "0.0.0.0")
-API_PORT = int(os.getenv("API_PORT", "8000"))
-
-# AWS/S3 configuration (optional)
-AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
-AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
-AWS_DEFAULT_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
-S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME", "fraud-detection-datasets")
+
+def ensure_dirs():
+    """Create the data, outputs and models directories if missing.
+
+    Called by the scripts and DAG tasks that write into them, so importing
+    config stays free of filesystem side effects.
+    """
+    for directory in [
+        RAW_DATA_DIR,
+        PROCESSED_DATA_DIR,
+        NEO4J_BACKUP_DIR,
+        OUTPUTS_DIR,
+        MODELS_DIR,
+    ]:
+        directory.mkdir(parents=True, exist_ok=True)
+
+
+# Raw table schemas (column -> dtype), used as read_csv dtype/usecols
+SCHEMAS = {
+    "users": {
+        "user_id": "str",
+        "is_fraudster": "bool",
+        "account_age_days": "int32",
+        "verification_level": "str",
+    },
+    "devices": {
+        "device_id": "str",
+        "device_type": "str",
+    },
+    "user_devices": {
+        "user_id": "str",
+        "device_id": "str",
+    },
+    "transactions": {
+        "transaction_id": "str",
+        "sender_id": "str",
+        "receiver_id": "str",
+        "amount": "float32",
+        "timestamp": "datetime64[ns]",
+        "is_fraudulent": "bool",
+        "status": "str",
+    },
+    "fraud_rings": {
+        "ring_id": "str",
+        "members": "str",
+    },
+}
+
+
+# Arrow type aliases for the SCHEMAS dtypes
+_ARROW_TYPES = {
+    "str": "string",
+    "bool": "bool",
+    "int32": "int32",
+    "float32": "float32",
+    "datetime64[ns]": "timestamp[ns]",
+}
+
+
+def arrow_schema(name, columns=None):
+    """Return the pyarrow schema of a raw table, or of `columns` of it.
+
+    Every reader casts to it, so a table has the same types whether it came
+    from Parquet, CSV or an Arrow IPC file.
+    """
+    import pyarrow as pa
+
+    schema = SCHEMAS[name]
+    return pa.schema(
+        [
+            (col, pa.type_for_alias(_ARROW_TYPES[schema[col]]))
+            for col in columns or schema
+        ]
+    )
+
+
+def _fresh_parquet_path(name):
+    """Return the table's Parquet path, or None if missing or older than the CSV."""
+    csv_path = RAW_DATA_DIR / f"{name}.csv"
+    parquet_path = RAW_DATA_DIR / f"{name}.parquet"
+    if not parquet_path.exists():
+        return None
+    if csv_path.exists() and parquet_path.stat().st_mtime < csv_path.stat().st_mtime:
+        return None
+    return parquet_path
+
+
+def read_arrow_table(name, columns=None, filters=None):
+    """Read a raw table as a pyarrow Table, preferring its Parquet copy.
+
+    The CSV fallback is memory-mapped and parsed on multiple threads.
+    `filters` is a pyarrow.compute expression and only applies to Parquet reads.
+    """
+    import pyarrow as pa
+
+    columns = list(columns or SCHEMAS[name])
+    target = arrow_schema(name, columns)
+    parquet_path = _fresh_parquet_path(name)
+
+    if parquet_path is not None:
+        import pyarrow.dataset as ds
+
+        return (
+            ds.dataset(parquet_path, format="parquet")
+            .to_table(columns=columns, filter=filters)
+            .cast(target)
+        )
+
+    import pyarrow.csv as pa_csv
+
+    with pa.memory_map(str(RAW_DATA_DIR / f"{name}.csv")) as source:
+        return pa_csv.read_csv(
+            source,
+            read_options=pa_csv.ReadOptions(use_threads=True, block_size=64 << 20),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=target,
+                include_columns=columns,
+                # Empty fields are missing values, as with pandas' reader
+                strings_can_be_null=True,
+            ),
+        )
+
+
+def load_table(name, columns=None, filters=None):
+    """Load a raw table as a DataFrame, preferring its Parquet copy over the CSV.
+
+    `filters` is a pyarrow.compute expression and only applies to Parquet reads.
+    """
+    # Both sources are already cast to arrow_schema(), so the dtypes match
+    table = read_arrow_table(name, columns, filters)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def iter_table(name, columns=None, batch_size=100_000):
+    """Yield a raw table as pyarrow RecordBatches, preferring its Parquet copy.
+
+    Only one batch is in memory at a time. Parquet batches hold at most
+    `batch_size` rows; the CSV fallback is parsed by pyarrow's streaming reader
+    in 16 MiB blocks. Both have the types of arrow_schema().
+    """
+    columns = list(columns or SCHEMAS[name])
+    target = arrow_schema(name, columns)
+    parquet_path = _fresh_parquet_path(name)
+
+    if parquet_path is not None:
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(parquet_path, format="parquet")
+        for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+            yield batch.cast(target)
+        return
+
+    import pyarrow.csv as pa_csv
+
+    with pa_csv.open_csv(
+        str(RAW_DATA_DIR / f"{name}.csv"),
+        read_options=pa_csv.ReadOptions(block_size=16 << 20),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=target,
+            include_columns=columns,
+            strings_can_be_null=True,
+        ),
+    ) as reader:
+        yield from reader
+
+
+def save_table(name, df, output_dir=None):
+    """Write a raw table as CSV plus a zstd Parquet copy.
+
+    The CSV is pandas' to_csv output, byte for byte what earlier versions
+    wrote. The Parquet copy is written by pyarrow with the arrow_schema()
+    types, and its row groups are sized so each CPU gets roughly one group to
+    read back.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    output_dir = Path(output_dir or RAW_DATA_DIR)
+    df.to_csv(output_dir / f"{name}.csv", index=False)
+    table = pa.Table.from_pandas(df, schema=arrow_schema(name), preserve_index=False)
+    pq.write_table(
+        table,
+        output_dir / f"{name}.parquet",
+        row_group_size=max(1, len(df) // (os.cpu_count() or 1) + 1),
+        compression="zstd",
+    )
+
+
+def save_high_risk_users(risk_df, high_risk_users, risk_threshold, timestamp):
+    """Write outputs/high_risk_users_<timestamp>.ndjson plus its _meta.json.
+
+    The list has one {user_id, risk_score} record per line so consumers can
+    stream it (pd.read_json(path, lines=True, chunksize=...)); the meta file
+    holds the run's scalars. Both are written to a temp file and renamed, so
+    readers never see partial outputs. Returns the two paths.
+    """
+    import json
+    from datetime import datetime
+
+    try:
+        import orjson
+
+        dumps = orjson.dumps
+    except ImportError:
+
+        def dumps(obj):
+            return json.dumps(obj).encode("utf-8")
+
+    high_risk_df = risk_df[risk_df["user_id"].isin(high_risk_users)]
+    users_path = OUTPUTS_DIR / f"high_risk_users_{timestamp}.ndjson"
+    tmp_path = users_path.with_suffix(".ndjson.tmp")
+    with open(tmp_path, "wb") as f:
+        for uid, score in zip(high_risk_df["user_id"], high_risk_df["risk_score"]):
+            f.write(dumps({"user_id": uid, "risk_score": float(score)}) + b"\n")
+    os.replace(tmp_path, users_path)
+
+    meta_path = OUTPUTS_DIR / f"high_risk_users_{timestamp}_meta.json"
+    tmp_path = meta_path.with_suffix(".json.tmp")
+    tmp_path.write_bytes(
+        dumps(
+            {
+                "timestamp": datetime.now().isoformat(),
+                "risk_threshold": risk_threshold,
+                "count": len(high_risk_users),
+                "users_file": users_path.name,
+            }
+        )
+    )
+    os.replace(tmp_path, meta_path)
+    return users_path, meta_path
+
+
+@dataclass(frozen=True)
+class Config:
+    """Environment-driven settings, parsed once per process by get_config()."""
+
+    # Dataset generation parameters
+    SEED: int
+    N_USERS: int
+    N_TRANSACTIONS: int
+    FRAUD_RATE: float
+
+    # Data versioning
+    DATA_VERSION: str
+
+    # Neo4j configuration
+    NEO4J_URI: str
+    NEO4J_USER: str
+    NEO4J_PASSWORD: str
+
+    # MLflow configuration
+    MLFLOW_TRACKING_URI: str
+    MLFLOW_EXPERIMENT_NAME: str
+    MLFLOW_ARTIFACT_ROOT: str
+
+    # Model parameters
+    RISK_THRESHOLD: float
+
+    # Risk score weights
+    DEVICE_RISK_WEIGHT: float
+    AGE_RISK_WEIGHT: float
+    AMOUNT_RISK_WEIGHT: float
+    VOLUME_RISK_WEIGHT: float
+    CENTRALITY_RISK_WEIGHT: float
+
+    # Target metrics
+    TARGET_PRECISION_MIN: float
+    TARGET_PRECISION_MAX: float
+    TARGET_RECALL_MIN: float  # Maximize recall
+
+    # Monitoring configuration
+    PROMETHEUS_PORT: int
+    METRICS_UPDATE_INTERVAL: int  # seconds
+
+    # API configuration
+    API_HOST: str
+    API_PORT: int
+
+    # AWS/S3 configuration (optional)
+    AWS_ACCESS_KEY_ID: Optional[str]
+    AWS_SECRET_ACCESS_KEY: Optional[str]
+    AWS_DEFAULT_REGION: str
+    S3_BUCKET_NAME: str
+
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Parse all environment settings once and cache the result."""
+    return Config(
+        SEED=int(os.getenv("SEED", "42")),
+        N_USERS=int(os.getenv("N_USERS", "200")),
+        N_TRANSACTIONS=int(os.getenv("N_TRANSACTIONS", "1000")),
+        FRAUD_RATE=float(os.getenv("FRAUD_RATE", "0.15")),
+        DATA_VERSION=os.getenv("DATA_VERSION", "v1.0"),
+        NEO4J_URI=os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+        NEO4J_USER=os.getenv("NEO4J_USER", "neo4j"),
+        NEO4J_PASSWORD=os.getenv("NEO4J_PASSWORD", "fraud_detection_2024"),
+        MLFLOW_TRACKING_URI=os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000"),
+        MLFLOW_EXPERIMENT_NAME=os.getenv("MLFLOW_EXPERIMENT_NAME", "fraud-detection"),
+        MLFLOW_ARTIFACT_ROOT=os.getenv("MLFLOW_ARTIFACT_ROOT", str(MODELS_DIR)),
+        RISK_THRESHOLD=float(os.getenv("RISK_THRESHOLD", "0.15")),
+        DEVICE_RISK_WEIGHT=float(os.getenv("DEVICE_RISK_WEIGHT", "0.35")),
+        AGE_RISK_WEIGHT=float(os.getenv("AGE_RISK_WEIGHT", "0.25")),
+        AMOUNT_RISK_WEIGHT=float(os.getenv("AMOUNT_RISK_WEIGHT", "0.20")),
+        VOLUME_RISK_WEIGHT=float(os.getenv("VOLUME_RISK_WEIGHT", "0.10")),
+        CENTRALITY_RISK_WEIGHT=float(os.getenv("CENTRALITY_RISK_WEIGHT", "0.10")),
+        TARGET_PRECISION_MIN=float(os.getenv("TARGET_PRECISION_MIN", "0.8")),
+        TARGET_PRECISION_MAX=float(os.getenv("TARGET_PRECISION_MAX", "0.9")),
+        TARGET_RECALL_MIN=float(os.getenv("TARGET_RECALL_MIN", "0.95")),
+        PROMETHEUS_PORT=int(os.getenv("PROMETHEUS_PORT", "8001")),
+        METRICS_UPDATE_INTERVAL=int(os.getenv("METRICS_UPDATE_INTERVAL", "60")),
+        API_HOST=os.getenv("API_HOST", "0.0.0.0"),
+        API_PORT=int(os.getenv("API_PORT", "8000")),
+        AWS_ACCESS_KEY_ID=os.getenv("AWS_ACCESS_KEY_ID"),
+        AWS_SECRET_ACCESS_KEY=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        AWS_DEFAULT_REGION=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
+        S3_BUCKET_NAME=os.getenv("S3_BUCKET_NAME", "fraud-detection-datasets"),
+    )
+
+
+def __getattr__(name):
+    """Keep `config.NEO4J_URI`-style access working on top of get_config()."""
+    try:
+        return getattr(get_config(), name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
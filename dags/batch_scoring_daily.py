@@ -4,12 +4,32 @@ Scores all users and generates risk reports
 """
 
 from airflow import DAG
+from airflow.datasets import Dataset
 from airflow.operators.python import PythonOperator
+from airflow.utils.dag_parsing_context import get_parsing_context
 from datetime import datetime, timedelta
 import sys
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+DAG_ID = "batch_scoring_daily"
+
+# Same path as config.RAW_DATA_DIR / "transactions.parquet"; updated by the
+# training DAG's generate_synthetic_data task
+TRANSACTIONS_DATASET = Dataset(
+    str(Path(__file__).parent.parent / "data" / "raw" / "transactions.parquet")
+)
+
+# Heavy and project imports are skipped only when a worker is parsing this file
+# to run a task of another DAG; a full parse (dag_id None) still binds them
+_current_dag_id = get_parsing_context().dag_id
+if _current_dag_id is None or _current_dag_id == DAG_ID:
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import config
+    from src.models.neo4j_graph_builder import Neo4jFraudGraph
+    from src.models.fraud_detector import FraudDetector
 
 default_args = {
     "owner": "mlops",
@@ -22,38 +42,49 @@ default_args = {
 }
 
 dag = DAG(
-    "batch_scoring_daily",
+    DAG_ID,
     default_args=default_args,
-    description="Daily batch scoring of all users",
-    schedule_interval="@daily",  # Every day at midnight
+    description="Batch scoring of all users whenever transactions are refreshed",
+    schedule=[TRANSACTIONS_DATASET],  # Only runs when new transactions land
     catchup=False,
     tags=["fraud-detection", "scoring", "batch"],
 )
 
 
+# Neo4j connections reused across task invocations in the same worker process
+_driver_cache = {}
+
+
+def get_graph():
+    """Return a cached Neo4jFraudGraph for the configured URI and user"""
+    import atexit
+
+    key = (config.NEO4J_URI, config.NEO4J_USER)
+    if key not in _driver_cache:
+        _driver_cache[key] = Neo4jFraudGraph(
+            uri=config.NEO4J_URI, user=config.NEO4J_USER, password=config.NEO4J_PASSWORD
+        )
+        atexit.register(_driver_cache[key].close)
+    return _driver_cache[key]
+
+
 def run_batch_scoring(**context):
     """Execute batch scoring pipeline"""
-    import config
-    import pandas as pd
-    import json
-    from datetime import datetime
-    from src.models.neo4j_graph_builder import Neo4jFraudGraph
-    from src.models.fraud_detector import FraudDetector
+    import os
 
     print("Running batch scoring...")
+    config.ensure_dirs()
 
     # Connect to Neo4j
-    neo4j_graph = Neo4jFraudGraph(
-        uri=config.NEO4J_URI, user=config.NEO4J_USER, password=config.NEO4J_PASSWORD
-    )
+    neo4j_graph = get_graph()
 
     # Load dataset
     dataset = {}
     for name in ["users", "devices", "user_devices", "transactions"]:
-        dataset[name] = pd.read_csv(config.RAW_DATA_DIR / f"{name}.csv")
+        dataset[name] = config.load_table(name)
 
-    # Run detection
-    detector = FraudDetector(neo4j_graph)
+    # Run detection; Louvain and PageRank run in Neo4j when GDS is installed
+    detector = FraudDetector(neo4j_graph, gds_graph=neo4j_graph)
     report = detector.generate_fraud_report(
         dataset["transactions"], risk_threshold=config.RISK_THRESHOLD
     )
@@ -61,27 +92,24 @@ def run_batch_scoring(**context):
     # Save results
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
+    # Write to temp files and rename so readers never see partial outputs
     risk_scores_path = config.OUTPUTS_DIR / f"risk_scores_{timestamp}.csv"
-    report["risk_scores"].to_csv(risk_scores_path, index=False)
-
-    high_risk_output = config.OUTPUTS_DIR / f"high_risk_users_{timestamp}.json"
-    with open(high_risk_output, "w") as f:
-        json.dump(
-            {
-                "timestamp": datetime.now().isoformat(),
-                "risk_threshold": config.RISK_THRESHOLD,
-                "high_risk_users": report["high_risk_users"],
-                "count": len(report["high_risk_users"]),
-            },
-            f,
-            indent=2,
-        )
+    tmp_path = risk_scores_path.with_suffix(".csv.tmp")
+    pa_csv.write_csv(
+        pa.Table.from_pandas(report["risk_scores"], preserve_index=False), tmp_path
+    )
+    os.replace(tmp_path, risk_scores_path)
+
+    config.save_high_risk_users(
+        report["risk_scores"],
+        report["high_risk_users"],
+        config.RISK_THRESHOLD,
+        timestamp,
+    )
 
     print(f"Scored {len(report['risk_scores'])} users")
     print(f"High-risk users: {len(report['high_risk_users'])}")
 
-    neo4j_graph.close()
-
     return {
         "total_users": len(report["risk_scores"]),
         "high_risk_users": len(report["high_risk_users"]),
@@ -21,16 +21,11 @@ def __():
     import marimo as mo
     import pandas as pd
     import numpy as np
-    import matplotlib.pyplot as plt
-    import seaborn as sns
-
-    from src.data.generate_dataset import FraudDatasetGenerator
 
-    sns.set_style("whitegrid")
-    plt.rcParams["figure.figsize"] = (12, 6)
+    # Plotting libraries and the generator are imported in the cells that use them
 
     mo.md("# Fraud Detection Dataset - Exploratory Data Analysis")
-    return FraudDatasetGenerator, mo, np, pd, plt, sns
+    return mo, np, pd
 
 
 @app.cell
@@ -47,14 +42,46 @@ def __(mo):
 
 
 @app.cell
-def __(FraudDatasetGenerator):
+def __(pd):
+    import hashlib
+
+    import config
+
     # Generate dataset
     SEED = 42
     N_USERS = 200
     N_TRANSACTIONS = 1000
 
-    generator = FraudDatasetGenerator(seed=SEED)
-    dataset = generator.generate_dataset(n_users=N_USERS, n_transactions=N_TRANSACTIONS)
+    def load_or_generate(seed, n_users, n_transactions):
+        """Load the cached Parquet tables for these parameters, or generate them"""
+        params = f"{seed}-{n_users}-{n_transactions}"
+        key = hashlib.md5(params.encode()).hexdigest()[:12]
+        cache_dir = config.DATA_DIR / "cache" / key
+        names = ["users", "devices", "user_devices", "transactions", "fraud_rings"]
+
+        if all((cache_dir / f"{name}.parquet").exists() for name in names):
+            return {
+                name: pd.read_parquet(cache_dir / f"{name}.parquet") for name in names
+            }
+
+        # Only needed on a cache miss
+        from src.data.generate_dataset import FraudDatasetGenerator
+
+        generator = FraudDatasetGenerator(seed=seed)
+        generated = generator.generate_dataset(
+            n_users=n_users, n_transactions=n_transactions
+        )
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for name, df in generated.items():
+            df.to_parquet(
+                cache_dir / f"{name}.parquet",
+                engine="pyarrow",
+                compression="zstd",
+                index=False,
+            )
+        return generated
+
+    dataset = load_or_generate(SEED, N_USERS, N_TRANSACTIONS)
 
     # Extract dataframes
     users_df = dataset["users"]
@@ -62,20 +89,85 @@ def __(FraudDatasetGenerator):
     user_devices_df = dataset["user_devices"]
     transactions_df = dataset["transactions"]
     fraud_rings_df = dataset["fraud_rings"]
+
+    # Bool flags and categorical labels, so masks and groupbys skip object dtype
+    users_df["is_fraudster"] = users_df["is_fraudster"].astype(bool)
+    users_df["verification_level"] = users_df["verification_level"].astype("category")
+    transactions_df["is_fraudulent"] = transactions_df["is_fraudulent"].astype(bool)
+    transactions_df["status"] = transactions_df["status"].astype("category")
+    # Parse timestamps once here rather than in each plotting cell
+    transactions_df["timestamp"] = pd.to_datetime(transactions_df["timestamp"])
+    # 32-bit numerics are ample for plots and correlations and halve their size
+    transactions_df["amount"] = transactions_df["amount"].astype("float32")
+    users_df["account_age_days"] = users_df["account_age_days"].astype("int32")
+
+    # Dense integer user codes shared by every table (-1 = unknown user), and
+    # the fraud flag as an array indexed by code
+    user_ids = pd.Categorical(users_df["user_id"])
+    users_df["user_code"] = user_ids.codes
+    transactions_df["sender_code"] = pd.Categorical(
+        transactions_df["sender_id"], categories=user_ids.categories
+    ).codes
+    transactions_df["receiver_code"] = pd.Categorical(
+        transactions_df["receiver_id"], categories=user_ids.categories
+    ).codes
+    user_devices_df["user_code"] = pd.Categorical(
+        user_devices_df["user_id"], categories=user_ids.categories
+    ).codes
+    is_fraud_by_code = users_df.sort_values("user_code")["is_fraudster"].to_numpy()
     return (
         N_TRANSACTIONS,
         N_USERS,
         SEED,
+        config,
         dataset,
         devices_df,
         fraud_rings_df,
-        generator,
+        hashlib,
+        is_fraud_by_code,
+        load_or_generate,
         transactions_df,
         user_devices_df,
+        user_ids,
         users_df,
     )
 
 
+@app.cell
+def __(transactions_df):
+    import pyarrow as pa
+
+    # Per-sender aggregates in one multithreaded Arrow group_by, shared by
+    # sections 5 and 8; only the small result is converted back to pandas
+    user_txn_stats = (
+        pa.Table.from_pandas(
+            transactions_df[["sender_id", "amount", "is_fraudulent"]],
+            preserve_index=False,
+        )
+        .group_by("sender_id")
+        .aggregate(
+            [
+                ("amount", "count"),
+                ("amount", "mean"),
+                ("amount", "sum"),
+                ("is_fraudulent", "sum"),
+            ]
+        )
+        .rename_columns(
+            {
+                "sender_id": "user_id",
+                "amount_count": "txn_count",
+                "amount_mean": "avg_amount",
+                "amount_sum": "total_amount",
+                "is_fraudulent_sum": "fraud_txn_count",
+            }
+        )
+        .sort_by("user_id")
+        .to_pandas()
+    )
+    return pa, user_txn_stats
+
+
 @app.cell
 def __(mo, pd, transactions_df, users_df):
     mo.md(
@@ -86,27 +178,41 @@ def __(mo, pd, transactions_df, users_df):
     """
     )
 
+    # Keep values numeric; formatting happens only in the rendered Styler
     summary_stats = {
         "Total Users": len(users_df),
         "Fraudsters": users_df["is_fraudster"].sum(),
         "Normal Users": (~users_df["is_fraudster"]).sum(),
-        "Fraud Rate": f"{users_df['is_fraudster'].mean():.1%}",
+        "Fraud Rate": users_df["is_fraudster"].mean(),
         "Total Transactions": len(transactions_df),
         "Fraudulent Transactions": transactions_df["is_fraudulent"].sum(),
         "Normal Transactions": (~transactions_df["is_fraudulent"]).sum(),
-        "Total Transaction Volume": f"${transactions_df['amount'].sum():,.2f}",
-        "Average Transaction Amount": f"${transactions_df['amount'].mean():.2f}",
+        "Total Transaction Volume": transactions_df["amount"].sum(),
+        "Average Transaction Amount": transactions_df["amount"].mean(),
     }
 
-    summary_df = pd.DataFrame([summary_stats]).T
-    summary_df.columns = ["Value"]
+    summary_df = pd.DataFrame(
+        {"Value": list(summary_stats.values())},
+        index=pd.Index(list(summary_stats), name="Metric"),
+        dtype="float64",
+    )
+    summary_view = (
+        summary_df.style.format("{:,.0f}")
+        .format("{:.1%}", subset=pd.IndexSlice[["Fraud Rate"], "Value"])
+        .format(
+            "${:,.2f}",
+            subset=pd.IndexSlice[
+                ["Total Transaction Volume", "Average Transaction Amount"], "Value"
+            ],
+        )
+    )
 
     mo.md(
         f"""
-    {mo.as_html(summary_df)}
+    {mo.as_html(summary_view)}
     """
     )
-    return summary_df, summary_stats
+    return summary_df, summary_stats, summary_view
 
 
 @app.cell
@@ -165,7 +271,7 @@ def __(mo):
 
 
 @app.cell
-def __(mo, transactions_df, user_devices_df, users_df):
+def __(mo, pd, transactions_df, user_devices_df, users_df):
     # Validate schemas
     validation_checks = []
 
@@ -198,13 +304,10 @@ def __(mo, transactions_df, user_devices_df, users_df):
         }
     )
 
-    # Referential integrity
-    all_user_ids = set(users_df["user_id"])
-    sender_ids = set(transactions_df["sender_id"])
-    receiver_ids = set(transactions_df["receiver_id"])
-    ref_check = sender_ids.issubset(all_user_ids) and receiver_ids.issubset(
-        all_user_ids
-    )
+    # Referential integrity: ids missing from users were coded as -1 at load
+    ref_check = (transactions_df["sender_code"] >= 0).all() and (
+        transactions_df["receiver_code"] >= 0
+    ).all()
     validation_checks.append(
         {
             "Check": "Referential Integrity (Transactions)",
@@ -213,8 +316,7 @@ def __(mo, transactions_df, user_devices_df, users_df):
     )
 
     # Device usage integrity
-    device_user_ids = set(user_devices_df["user_id"])
-    device_check = device_user_ids.issubset(all_user_ids)
+    device_check = (user_devices_df["user_code"] >= 0).all()
     validation_checks.append(
         {
             "Check": "Referential Integrity (User-Devices)",
@@ -236,22 +338,15 @@ def __(mo, transactions_df, user_devices_df, users_df):
         {"Check": "Account Ages Positive", "Status": "Pass" if age_check else "Fail"}
     )
 
-    import pandas as pd_check
-
-    validation_df = pd_check.DataFrame(validation_checks)
+    validation_df = pd.DataFrame(validation_checks)
     mo.as_html(validation_df)
     return (
         age_check,
-        all_user_ids,
         amount_check,
         device_check,
-        device_user_ids,
         expected_txn_cols,
         expected_user_cols,
-        pd_check,
-        receiver_ids,
         ref_check,
-        sender_ids,
         txn_check,
         users_check,
         validation_checks,
@@ -272,24 +367,42 @@ def __(mo):
 
 
 @app.cell
-def __(mo, plt, sns, users_df):
+def __(mo, np, pd, users_df):
+    import matplotlib
+
+    # Figures are only rendered to images via mo.as_html, so use the Agg backend
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    from src.data.aggregations import crosstab_code_flag
+
+    sns.set_style("whitegrid")
+    plt.rcParams["figure.figsize"] = (12, 6)
+
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
 
-    # Account age distribution by fraud status
-    sns.histplot(
-        data=users_df,
-        x="account_age_days",
-        hue="is_fraudster",
-        kde=True,
-        ax=axes[0, 0],
-        bins=30,
-    )
+    # Account age distribution by fraud status (shared bin edges, no KDE pass)
+    age_values = users_df["account_age_days"].to_numpy()
+    fraudster_mask = users_df["is_fraudster"].to_numpy()
+    age_counts_normal, age_edges = np.histogram(age_values[~fraudster_mask], bins=30)
+    age_counts_fraud, _ = np.histogram(age_values[fraudster_mask], bins=age_edges)
+    axes[0, 0].stairs(age_counts_normal, age_edges, label="normal")
+    axes[0, 0].stairs(age_counts_fraud, age_edges, label="fraud")
+    axes[0, 0].legend(title="Is Fraudster")
     axes[0, 0].set_title("Account Age Distribution by Fraud Status")
     axes[0, 0].set_xlabel("Account Age (days)")
 
     # Verification level distribution
-    fraud_counts = (
-        users_df.groupby(["verification_level", "is_fraudster"]).size().unstack()
+    levels = users_df["verification_level"].cat
+    fraud_counts = pd.DataFrame(
+        crosstab_code_flag(
+            levels.codes.to_numpy(),
+            users_df["is_fraudster"].to_numpy(),
+            len(levels.categories),
+        ),
+        index=pd.Index(levels.categories, name="verification_level"),
+        columns=pd.Index([False, True], name="is_fraudster"),
     )
     fraud_counts.plot(kind="bar", ax=axes[0, 1], stacked=False)
     axes[0, 1].set_title("Verification Level Distribution")
@@ -299,7 +412,8 @@ def __(mo, plt, sns, users_df):
     axes[0, 1].tick_params(axis="x", rotation=0)
 
     # Fraud rate by verification level
-    fraud_rate_by_level = users_df.groupby("verification_level")["is_fraudster"].mean()
+    # Derived from the crosstab above rather than another groupby
+    fraud_rate_by_level = fraud_counts[True] / fraud_counts.sum(axis=1)
     fraud_rate_by_level.plot(kind="bar", ax=axes[1, 0], color="coral")
     axes[1, 0].set_title("Fraud Rate by Verification Level")
     axes[1, 0].set_xlabel("Verification Level")
@@ -312,21 +426,43 @@ def __(mo, plt, sns, users_df):
     axes[1, 1].set_xlabel("Is Fraudster")
     axes[1, 1].set_ylabel("Account Age (days)")
 
-    plt.tight_layout()
-    fig_users = plt.gcf()
-    plt.close()
+    fig.tight_layout()
+    plt.close(fig)
+
+    # Mean account age per fraud status in one groupby
+    age_means = (
+        users_df.groupby("is_fraudster")["account_age_days"]
+        .mean()
+        .reindex([False, True])
+    )
 
     mo.md(
         f"""
-    {mo.as_html(fig_users)}
+    {mo.as_html(fig)}
 
     **Key Observations:**
-    - Fraudster accounts are significantly younger (mean: {users_df[users_df['is_fraudster']]['account_age_days'].mean():.1f} days)
-    - Normal user accounts are much older (mean: {users_df[~users_df['is_fraudster']]['account_age_days'].mean():.1f} days)
+    - Fraudster accounts are significantly younger (mean: {age_means[True]:.1f} days)
+    - Normal user accounts are much older (mean: {age_means[False]:.1f} days)
     - This is a strong fraud indicator
     """
     )
-    return axes, fig, fig_users, fraud_counts, fraud_rate_by_level
+    return (
+        age_counts_fraud,
+        age_counts_normal,
+        age_edges,
+        age_means,
+        age_values,
+        axes,
+        crosstab_code_flag,
+        fig,
+        fraud_counts,
+        levels,
+        fraud_rate_by_level,
+        fraudster_mask,
+        matplotlib,
+        plt,
+        sns,
+    )
 
 
 @app.cell
@@ -340,29 +476,44 @@ def __(mo):
 
 
 @app.cell
-def __(mo, plt, sns, transactions_df):
+def __(SEED, crosstab_code_flag, mo, np, pd, plt, sns, transactions_df):
+    # Bounded sample for seaborn's per-point rendering; aggregates use the full frame
+    plot_tx = transactions_df.sample(
+        n=min(len(transactions_df), 50_000), random_state=SEED
+    )
+
     fig_txn, axes_txn = plt.subplots(2, 2, figsize=(14, 10))
 
-    # Transaction amount distribution
-    sns.histplot(
-        data=transactions_df,
-        x="amount",
-        hue="is_fraudulent",
-        kde=True,
-        ax=axes_txn[0, 0],
-        bins=50,
+    # Transaction amount distribution (shared bin edges, no KDE pass)
+    amount_values = transactions_df["amount"].to_numpy()
+    fraudulent_mask = transactions_df["is_fraudulent"].to_numpy()
+    amount_counts_normal, amount_edges = np.histogram(
+        amount_values[~fraudulent_mask], bins=50
+    )
+    amount_counts_fraud, _ = np.histogram(
+        amount_values[fraudulent_mask], bins=amount_edges
     )
+    axes_txn[0, 0].stairs(amount_counts_normal, amount_edges, label="normal")
+    axes_txn[0, 0].stairs(amount_counts_fraud, amount_edges, label="fraud")
+    axes_txn[0, 0].legend(title="Is Fraudulent")
     axes_txn[0, 0].set_title("Transaction Amount Distribution")
     axes_txn[0, 0].set_xlabel("Amount ($)")
 
     # Box plot: Amount by fraud status
-    sns.boxplot(data=transactions_df, x="is_fraudulent", y="amount", ax=axes_txn[0, 1])
+    sns.boxplot(data=plot_tx, x="is_fraudulent", y="amount", ax=axes_txn[0, 1])
     axes_txn[0, 1].set_title("Transaction Amount by Fraud Status")
     axes_txn[0, 1].set_ylabel("Amount ($)")
 
     # Transaction status distribution
-    status_counts = (
-        transactions_df.groupby(["status", "is_fraudulent"]).size().unstack()
+    statuses = transactions_df["status"].cat
+    status_counts = pd.DataFrame(
+        crosstab_code_flag(
+            statuses.codes.to_numpy(),
+            transactions_df["is_fraudulent"].to_numpy(),
+            len(statuses.categories),
+        ),
+        index=pd.Index(statuses.categories, name="status"),
+        columns=pd.Index([False, True], name="is_fraudulent"),
     )
     status_counts.plot(kind="bar", ax=axes_txn[1, 0], stacked=False)
     axes_txn[1, 0].set_title("Transaction Status Distribution")
@@ -371,29 +522,50 @@ def __(mo, plt, sns, transactions_df):
     axes_txn[1, 0].tick_params(axis="x", rotation=0)
 
     # Fraud rate over time (sample)
-    transactions_df["date"] = pd.to_datetime(transactions_df["timestamp"]).dt.date
-    daily_fraud_rate = transactions_df.groupby("date")["is_fraudulent"].mean()
-    daily_fraud_rate.plot(ax=axes_txn[1, 1], marker="o", color="red")
+    daily_fraud_rate = transactions_df.groupby(
+        transactions_df["timestamp"].dt.floor("D")
+    )["is_fraudulent"].mean()
+    # One Line2D for the whole series
+    axes_txn[1, 1].plot(
+        daily_fraud_rate.index.values, daily_fraud_rate.values, marker="o", color="red"
+    )
     axes_txn[1, 1].set_title("Daily Fraud Rate Trend")
     axes_txn[1, 1].set_xlabel("Date")
     axes_txn[1, 1].set_ylabel("Fraud Rate")
     axes_txn[1, 1].tick_params(axis="x", rotation=45)
 
-    plt.tight_layout()
-    fig_txn_final = plt.gcf()
-    plt.close()
+    fig_txn.tight_layout()
+    plt.close(fig_txn)
+
+    # Mean amount per fraud status in one groupby
+    amount_means = (
+        transactions_df.groupby("is_fraudulent")["amount"].mean().reindex([False, True])
+    )
 
     mo.md(
         f"""
-    {mo.as_html(fig_txn_final)}
+    {mo.as_html(fig_txn)}
 
     **Key Observations:**
-    - Fraudulent transactions have higher amounts (mean: ${transactions_df[transactions_df['is_fraudulent']]['amount'].mean():.2f})
-    - Normal transactions are smaller (mean: ${transactions_df[~transactions_df['is_fraudulent']]['amount'].mean():.2f})
+    - Fraudulent transactions have higher amounts (mean: ${amount_means[True]:.2f})
+    - Normal transactions are smaller (mean: ${amount_means[False]:.2f})
     - Transaction amount is a strong fraud indicator
     """
     )
-    return axes_txn, daily_fraud_rate, fig_txn, fig_txn_final, status_counts
+    return (
+        amount_counts_fraud,
+        amount_counts_normal,
+        amount_edges,
+        amount_means,
+        amount_values,
+        axes_txn,
+        daily_fraud_rate,
+        fig_txn,
+        fraudulent_mask,
+        plot_tx,
+        status_counts,
+        statuses,
+    )
 
 
 @app.cell
@@ -409,20 +581,12 @@ def __(mo):
 
 
 @app.cell
-def __(mo, pd, transactions_df, users_df):
+def __(mo, user_txn_stats, users_df):
     # User statistics
     user_stats = users_df.groupby("is_fraudster")["account_age_days"].describe()
 
-    # Transaction statistics
-    txn_stats_by_user = (
-        transactions_df.groupby("sender_id")
-        .agg({"amount": ["count", "mean", "sum"]})
-        .reset_index()
-    )
-    txn_stats_by_user.columns = ["user_id", "txn_count", "avg_amount", "total_amount"]
-
-    # Merge with user fraud status
-    txn_stats_with_fraud = txn_stats_by_user.merge(
+    # Merge transaction statistics with user fraud status
+    txn_stats_with_fraud = user_txn_stats.merge(
         users_df[["user_id", "is_fraudster"]], on="user_id", how="left"
     )
 
@@ -440,7 +604,6 @@ def __(mo, pd, transactions_df, users_df):
     """
     )
     return (
-        txn_stats_by_user,
         txn_stats_with_fraud,
         txn_summary,
         user_stats,
@@ -458,20 +621,19 @@ def __(mo):
 
 
 @app.cell
-def __(fraud_rings_df, mo, pd):
-    # Parse fraud rings
-    ring_analysis = []
-    for _, row in fraud_rings_df.iterrows():
-        members = row["members"].split(",")
-        ring_analysis.append(
-            {
-                "Ring ID": row["ring_id"],
-                "Member Count": len(members),
-                "Members": ", ".join(members[:3]) + ("..." if len(members) > 3 else ""),
-            }
-        )
+def __(fraud_rings_df, mo, np, pd):
+    # Parse fraud rings (vectorized string ops, no per-row loop)
+    members = fraud_rings_df["members"].str.split(",")
+    member_count = members.str.len()
+    preview = members.str[:3].str.join(", ") + np.where(member_count > 3, "...", "")
 
-    ring_df = pd.DataFrame(ring_analysis)
+    ring_df = pd.DataFrame(
+        {
+            "Ring ID": fraud_rings_df["ring_id"],
+            "Member Count": member_count,
+            "Members": preview,
+        }
+    )
 
     mo.md(
         f"""
@@ -484,7 +646,7 @@ def __(fraud_rings_df, mo, pd):
     Fraud rings represent groups of fraudsters sharing devices and coordinating activities.
     """
     )
-    return members, ring_analysis, ring_df, row
+    return member_count, members, preview, ring_df
 
 
 @app.cell
@@ -498,33 +660,39 @@ def __(mo):
 
 
 @app.cell
-def __(devices_df, mo, pd, user_devices_df, users_df):
-    # Calculate device sharing
-    device_sharing = (
-        user_devices_df.groupby("device_id")["user_id"]
-        .agg(["count", list])
-        .reset_index()
+def __(devices_df, is_fraud_by_code, mo, pd, user_devices_df):
+    from src.data.aggregations import count_device_fraudsters
+
+    # Users and fraudsters per device, counted over integer device codes
+    user_codes = user_devices_df["user_code"].to_numpy()
+    known_user = user_codes >= 0
+    device_codes = pd.Categorical(user_devices_df["device_id"][known_user])
+    user_count, fraudsters = count_device_fraudsters(
+        device_codes.codes,
+        is_fraud_by_code[user_codes[known_user]],
+        len(device_codes.categories),
+    )
+    device_sharing = pd.DataFrame(
+        {
+            "device_id": device_codes.categories,
+            "user_count": user_count,
+            "fraudsters": fraudsters,
+        }
     )
-    device_sharing.columns = ["device_id", "user_count", "user_list"]
 
     # Identify shared devices
     shared_devices = device_sharing[device_sharing["user_count"] > 1]
 
-    # For each shared device, count how many fraudsters use it
-    shared_device_analysis = []
-    for _, dev_row in shared_devices.iterrows():
-        user_ids = dev_row["user_list"]
-        fraud_count = users_df[users_df["user_id"].isin(user_ids)]["is_fraudster"].sum()
-        shared_device_analysis.append(
-            {
-                "Device ID": dev_row["device_id"],
-                "Total Users": dev_row["user_count"],
-                "Fraudsters": fraud_count,
-                "Fraud Rate": f"{fraud_count / dev_row['user_count']:.1%}",
-            }
-        )
-
-    shared_dev_df = pd.DataFrame(shared_device_analysis)
+    shared_dev_df = pd.DataFrame(
+        {
+            "Device ID": shared_devices["device_id"],
+            "Total Users": shared_devices["user_count"],
+            "Fraudsters": shared_devices["fraudsters"],
+            "Fraud Rate": (
+                shared_devices["fraudsters"] / shared_devices["user_count"]
+            ).map("{:.1%}".format),
+        }
+    ).reset_index(drop=True)
 
     mo.md(
         f"""
@@ -540,15 +708,15 @@ def __(devices_df, mo, pd, user_devices_df, users_df):
     """
     )
     return (
-        dev_row,
+        count_device_fraudsters,
+        device_codes,
         device_sharing,
-        fraud_count,
+        fraudsters,
+        known_user,
         shared_dev_df,
-        shared_device_analysis,
         shared_devices,
+        user_codes,
         user_count,
-        user_ids,
-        user_list,
     )
 
 
@@ -563,38 +731,32 @@ def __(mo):
 
 
 @app.cell
-def __(mo, np, plt, sns, transactions_df, users_df):
+def __(mo, np, pd, plt, sns, user_txn_stats, users_df):
     # Prepare features for correlation
     user_features = users_df[["user_id", "is_fraudster", "account_age_days"]].copy()
     user_features["is_fraudster_int"] = user_features["is_fraudster"].astype(int)
 
-    # Transaction features per user
-    txn_features = (
-        transactions_df.groupby("sender_id")
-        .agg({"amount": ["count", "mean", "sum"], "is_fraudulent": "sum"})
-        .reset_index()
+    # Gather per-user transaction features by user_id (users without
+    # transactions get zeros), instead of a left merge plus fillna
+    txn_by_user = (
+        user_txn_stats.set_index("user_id")
+        .reindex(user_features["user_id"].to_numpy(), fill_value=0)
+        .reset_index(drop=True)
     )
-    txn_features.columns = [
-        "user_id",
-        "txn_count",
-        "avg_txn_amount",
-        "total_txn_amount",
-        "fraud_txn_count",
-    ]
-
-    # Merge features
-    feature_df = user_features.merge(txn_features, on="user_id", how="left").fillna(0)
+    feature_df = pd.concat([user_features.reset_index(drop=True), txn_by_user], axis=1)
 
     # Calculate correlation matrix
     corr_cols = [
         "is_fraudster_int",
         "account_age_days",
         "txn_count",
-        "avg_txn_amount",
-        "total_txn_amount",
+        "avg_amount",
+        "total_amount",
         "fraud_txn_count",
     ]
-    corr_matrix = feature_df[corr_cols].corr()
+    # One np.corrcoef over a contiguous (features x users) float32 array
+    corr_values = np.corrcoef(feature_df[corr_cols].to_numpy(dtype=np.float32).T)
+    corr_matrix = pd.DataFrame(corr_values, index=corr_cols, columns=corr_cols)
 
     # Plot correlation heatmap
     fig_corr, ax_corr = plt.subplots(figsize=(10, 8))
@@ -610,17 +772,16 @@ def __(mo, np, plt, sns, transactions_df, users_df):
         vmax=1,
     )
     ax_corr.set_title("Feature Correlation Matrix")
-    plt.tight_layout()
-    fig_corr_final = plt.gcf()
-    plt.close()
+    fig_corr.tight_layout()
+    plt.close(fig_corr)
 
     mo.md(
         f"""
-    {mo.as_html(fig_corr_final)}
+    {mo.as_html(fig_corr)}
 
     **Key Correlations:**
     - **is_fraudster vs account_age_days**: {corr_matrix.loc['is_fraudster_int', 'account_age_days']:.3f} (strong negative)
-    - **is_fraudster vs avg_txn_amount**: {corr_matrix.loc['is_fraudster_int', 'avg_txn_amount']:.3f} (strong positive)
+    - **is_fraudster vs avg_amount**: {corr_matrix.loc['is_fraudster_int', 'avg_amount']:.3f} (strong positive)
     - **is_fraudster vs txn_count**: {corr_matrix.loc['is_fraudster_int', 'txn_count']:.3f} (positive)
 
     These correlations confirm our fraud detection features are meaningful.
@@ -628,20 +789,34 @@ def __(mo, np, plt, sns, transactions_df, users_df):
     )
     return (
         ax_corr,
-        avg_txn_amount,
         corr_cols,
         corr_matrix,
+        corr_values,
         feature_df,
         fig_corr,
-        fig_corr_final,
-        fraud_txn_count,
         is_fraudster_int,
-        total_txn_amount,
-        txn_features,
+        txn_by_user,
         user_features,
     )
 
 
+@app.cell
+def __(config, feature_df, mo, user_txn_stats):
+    # Materialize per-user aggregates once so the follow-up notebooks can
+    # pd.read_parquet them instead of regrouping the transactions
+    eda_output_dir = config.PROCESSED_DATA_DIR / "eda"
+    eda_output_dir.mkdir(parents=True, exist_ok=True)
+    user_txn_stats.to_parquet(
+        eda_output_dir / "user_txn_stats.parquet", compression="zstd", index=False
+    )
+    feature_df.to_parquet(
+        eda_output_dir / "feature_df.parquet", compression="zstd", index=False
+    )
+
+    mo.md(f"Per-user aggregates saved to `{eda_output_dir}` for the next notebooks.")
+    return (eda_output_dir,)
+
+
 @app.cell
 def __(mo):
     mo.md(
@@ -672,16 +847,8 @@ def __(mo):
     return
 
 
-# Missing import for pandas
-import pandas as pd
-
 # Define missing variables with placeholder values
-user_count = 0
-user_list = []
-avg_txn_amount = 0.0
-fraud_txn_count = 0
 is_fraudster_int = 0
-total_txn_amount = 0.0
 
 
 if __name__ == "__main__":
@@ -14,6 +14,10 @@ def __():
     import marimo as mo
     import pandas as pd
     import numpy as np
+    import matplotlib
+
+    # Figures are only rendered to images via mo.as_html, so use the Agg backend
+    matplotlib.use("Agg")
     import matplotlib.pyplot as plt
     import seaborn as sns
     import networkx as nx
@@ -35,6 +39,7 @@ def __():
         FraudDetector,
         FraudGraph,
         Path,
+        matplotlib,
         mo,
         np,
         nx,
@@ -112,22 +117,36 @@ def __(mo):
 
 
 @app.cell
-def __(G, mo, np, plt):
-    # Calculate degree distribution
-    degrees = [G.degree(n) for n in G.nodes()]
+def __(G, mo, np, nx, plt):
+    # Degree and node type arrays from one bulk pass each over the graph
+    degree_by_node = dict(G.degree())
+    node_types = nx.get_node_attributes(G, "node_type")
+    degrees = np.fromiter(
+        degree_by_node.values(), dtype=np.int32, count=len(degree_by_node)
+    )
+    types = np.array([node_types.get(n, "") for n in degree_by_node])
 
     # Separate by node type
-    user_degrees = [
-        G.degree(n) for n in G.nodes() if G.nodes[n].get("node_type") == "user"
-    ]
-    device_degrees = [
-        G.degree(n) for n in G.nodes() if G.nodes[n].get("node_type") == "device"
-    ]
+    user_degrees = degrees[types == "user"]
+    device_degrees = degrees[types == "device"]
+
+    def plot_degree_hist(ax, values, bins, **kwargs):
+        """Bin with np.histogram and draw the counts as bars"""
+        counts, edges = np.histogram(values, bins=bins)
+        ax.bar(
+            edges[:-1],
+            counts,
+            width=np.diff(edges),
+            align="edge",
+            edgecolor="black",
+            alpha=0.7,
+            **kwargs,
+        )
 
     fig_degree, axes_deg = plt.subplots(1, 3, figsize=(16, 5))
 
     # Overall degree distribution
-    axes_deg[0].hist(degrees, bins=30, edgecolor="black", alpha=0.7)
+    plot_degree_hist(axes_deg[0], degrees, bins=30)
     axes_deg[0].set_title("Overall Degree Distribution")
     axes_deg[0].set_xlabel("Degree")
     axes_deg[0].set_ylabel("Count")
@@ -140,9 +159,7 @@ def __(G, mo, np, plt):
     axes_deg[0].legend()
 
     # User degree distribution
-    axes_deg[1].hist(
-        user_degrees, bins=20, edgecolor="black", alpha=0.7, color="skyblue"
-    )
+    plot_degree_hist(axes_deg[1], user_degrees, bins=20, color="skyblue")
     axes_deg[1].set_title("User Node Degree Distribution")
     axes_deg[1].set_xlabel("Degree")
     axes_deg[1].set_ylabel("Count")
@@ -155,9 +172,7 @@ def __(G, mo, np, plt):
     axes_deg[1].legend()
 
     # Device degree distribution
-    axes_deg[2].hist(
-        device_degrees, bins=15, edgecolor="black", alpha=0.7, color="lightcoral"
-    )
+    plot_degree_hist(axes_deg[2], device_degrees, bins=15, color="lightcoral")
     axes_deg[2].set_title("Device Node Degree Distribution")
     axes_deg[2].set_xlabel("Degree")
     axes_deg[2].set_ylabel("Count")
@@ -169,13 +184,12 @@ def __(G, mo, np, plt):
     )
     axes_deg[2].legend()
 
-    plt.tight_layout()
-    fig_degree_final = plt.gcf()
-    plt.close()
+    fig_degree.tight_layout()
+    plt.close(fig_degree)
 
     mo.md(
         f"""
-    {mo.as_html(fig_degree_final)}
+    {mo.as_html(fig_degree)}
 
     **Key Observations:**
     - Most nodes have low degree (few connections)
@@ -186,10 +200,13 @@ def __(G, mo, np, plt):
     )
     return (
         axes_deg,
+        degree_by_node,
         degrees,
         device_degrees,
         fig_degree,
-        fig_degree_final,
+        node_types,
+        plot_degree_hist,
+        types,
         user_degrees,
     )
 
@@ -206,7 +223,12 @@ def __(mo):
 
 @app.cell
 def __(FraudDetector, fraud_graph, mo, pd):
-    detector = FraudDetector(fraud_graph)
+    import os
+
+    # Pure NetworkX by default; set GRAPH_BACKEND=cugraph to dispatch Louvain,
+    # PageRank and betweenness to cuGraph (falls back when it is not installed)
+    GRAPH_BACKEND = os.environ.get("GRAPH_BACKEND")
+    detector = FraudDetector(fraud_graph, backend=GRAPH_BACKEND)
     communities = detector.detect_communities()
 
     # Community size distribution
@@ -225,35 +247,30 @@ def __(FraudDetector, fraud_graph, mo, pd):
     Fraud rings often form distinct communities.
     """
     )
-    return communities, community_sizes, detector
+    return GRAPH_BACKEND, communities, community_sizes, detector
 
 
 @app.cell
-def __(communities, dataset, mo, pd, plt):
-    # Analyze fraud concentration in communities
-    community_fraud_analysis = []
+def __(communities, dataset, mo, np, pd, plt):
+    # Analyze fraud concentration in communities: is_fraudster as a dense bool
+    # array indexed by categorical user codes, then a single groupby
     users_df_comm = dataset["users"]
+    user_ids = pd.Index(users_df_comm["user_id"])
+    is_fraud_arr = users_df_comm["is_fraudster"].to_numpy(dtype=bool)
+    comm_series = pd.Series(communities, name="community")
+    comm_codes = pd.Categorical(comm_series.index, categories=user_ids).codes
 
-    for comm_id in set(communities.values()):
-        comm_members = [u for u, c in communities.items() if c == comm_id]
-        fraud_count = sum(
-            1
-            for uid in comm_members
-            if users_df_comm[users_df_comm["user_id"] == uid]["is_fraudster"].any()
-        )
-        community_fraud_analysis.append(
-            {
-                "Community ID": comm_id,
-                "Size": len(comm_members),
-                "Fraudsters": fraud_count,
-                "Fraud Rate": (
-                    fraud_count / len(comm_members) if len(comm_members) > 0 else 0
-                ),
-            }
-        )
-
-    comm_fraud_df = pd.DataFrame(community_fraud_analysis).sort_values(
-        "Fraud Rate", ascending=False
+    comm_fraud_df = (
+        comm_series.to_frame()
+        .assign(is_fraud=(comm_codes >= 0) & is_fraud_arr[comm_codes])
+        .groupby("community")["is_fraud"]
+        .agg(Size="size", Fraudsters="sum")
+        .rename_axis("Community ID")
+        .reset_index()
+    )
+    comm_fraud_df["Fraud Rate"] = comm_fraud_df["Fraudsters"] / comm_fraud_df["Size"]
+    comm_fraud_df.sort_values(
+        "Fraud Rate", ascending=False, inplace=True, kind="stable"
     )
 
     # Plot fraud rate by community
@@ -268,9 +285,8 @@ def __(communities, dataset, mo, pd, plt):
         y=0.15, color="red", linestyle="--", label="Overall Fraud Rate (15%)"
     )
     ax_comm.legend()
-    plt.tight_layout()
-    fig_comm_final = plt.gcf()
-    plt.close()
+    fig_comm.tight_layout()
+    plt.close(fig_comm)
 
     mo.md(
         f"""
@@ -278,21 +294,19 @@ def __(communities, dataset, mo, pd, plt):
 
     {mo.as_html(comm_fraud_df.head(10))}
 
-    {mo.as_html(fig_comm_final)}
+    {mo.as_html(fig_comm)}
 
     **High-risk communities** (fraud rate > 50%) should be investigated for fraud rings.
     """
     )
     return (
         ax_comm,
+        comm_codes,
         comm_fraud_df,
-        comm_id,
-        comm_members,
-        community_fraud_analysis,
+        comm_series,
         fig_comm,
-        fig_comm_final,
-        fraud_count,
-        uid,
+        is_fraud_arr,
+        user_ids,
         users_df_comm,
     )
 
@@ -352,29 +366,39 @@ def __(mo):
 
 
 @app.cell
-def __(fraud_graph, mo, pd):
+def __(fraud_graph, is_fraud_arr, mo, np, pd, user_ids):
     shared_devices = fraud_graph.get_shared_devices()
 
-    shared_analysis = []
-    for device_id, user_list in shared_devices.items():
-        users_df_shared = dataset["users"]
-        fraud_count_shared = sum(
-            1
-            for u in user_list
-            if users_df_shared[users_df_shared["user_id"] == u]["is_fraudster"].any()
+    # Long (device_id, user_id) table with the fraud flag read from the dense
+    # array by user code, aggregated in one groupby instead of per device
+    pairs = pd.DataFrame.from_records(
+        [(d, u) for d, us in shared_devices.items() for u in us],
+        columns=["device_id", "user_id"],
+    )
+    pair_codes = pd.Categorical(pairs["user_id"], categories=user_ids).codes
+    pairs["is_fraudster"] = (pair_codes >= 0) & is_fraud_arr[pair_codes]
+    device_users = pd.Series(shared_devices, dtype=object)
+    shared_df = (
+        pairs.groupby("device_id")
+        .agg(
+            **{
+                "User Count": ("user_id", "size"),
+                "Fraudsters": ("is_fraudster", "sum"),
+            }
         )
-        shared_analysis.append(
-            {
-                "Device ID": device_id,
-                "User Count": len(user_list),
-                "Fraudsters": fraud_count_shared,
-                "Fraud Rate": fraud_count_shared / len(user_list) if user_list else 0,
-                "Users": ", ".join(user_list[:3])
-                + ("..." if len(user_list) > 3 else ""),
+        .assign(
+            **{
+                "Users": device_users.str[:3].str.join(", ")
+                + np.where(device_users.str.len() > 3, "...", "")
             }
         )
-
-    shared_df = pd.DataFrame(shared_analysis).sort_values("Fraud Rate", ascending=False)
+        .rename_axis("Device ID")
+        .reset_index()
+    )
+    shared_df.insert(
+        3, "Fraud Rate", shared_df["Fraudsters"] / shared_df["User Count"]
+    )
+    shared_df.sort_values("Fraud Rate", ascending=False, inplace=True, kind="stable")
 
     mo.md(
         f"""
@@ -388,16 +412,7 @@ def __(fraud_graph, mo, pd):
     These devices should be flagged for investigation.
     """
     )
-    return (
-        device_id,
-        fraud_count_shared,
-        shared_analysis,
-        shared_devices,
-        shared_df,
-        u,
-        user_list,
-        users_df_shared,
-    )
+    return device_users, pair_codes, pairs, shared_devices, shared_df
 
 
 @app.cell
@@ -419,9 +434,12 @@ def __(mo, nx, plt, transaction_network):
     # Calculate network density
     network_density = nx.density(transaction_network)
 
-    # Try to calculate clustering (may fail for directed graph)
+    # Sampled clustering estimate (1000 random wedges) on an undirected view,
+    # instead of an exact per-node triangle count on an undirected copy
     try:
-        avg_clustering = nx.average_clustering(transaction_network.to_undirected())
+        avg_clustering = nx.approximation.average_clustering(
+            transaction_network.to_undirected(as_view=True), trials=1000, seed=42
+        )
     except:
         avg_clustering = None
 
@@ -451,20 +469,19 @@ def __(mo, nx, plt, transaction_network):
     axes_txn_net[1].set_xlabel("Out-Degree")
     axes_txn_net[1].set_ylabel("Count")
 
-    plt.tight_layout()
-    fig_txn_net_final = plt.gcf()
-    plt.close()
+    fig_txn_net.tight_layout()
+    plt.close(fig_txn_net)
 
     mo.md(
         f"""
     ### Transaction Network Properties
 
     - **Network density**: {network_density:.4f}
-    - **Average clustering coefficient**: {avg_clustering:.4f if avg_clustering else 'N/A'}
+    - **Average clustering coefficient**: {f"{avg_clustering:.4f}" if avg_clustering is not None else "N/A"}
     - **Number of nodes**: {transaction_network.number_of_nodes()}
     - **Number of edges**: {transaction_network.number_of_edges()}
 
-    {mo.as_html(fig_txn_net_final)}
+    {mo.as_html(fig_txn_net)}
 
     **Interpretation:**
     - Low density indicates sparse network (not everyone transacts with everyone)
@@ -476,7 +493,6 @@ def __(mo, nx, plt, transaction_network):
         avg_clustering,
         axes_txn_net,
         fig_txn_net,
-        fig_txn_net_final,
         in_degrees,
         network_density,
         out_degrees,
@@ -494,27 +510,49 @@ def __(mo):
 
 
 @app.cell
-def __(G, dataset, mo, nx, plt):
+def __(G, dataset, mo, np, nx, plt):
     # Extract fraud ring subgraph
-    fraudsters = dataset["users"][dataset["users"]["is_fraudster"]]["user_id"].tolist()
+    users_df_ring = dataset["users"]
+    fraudster_set = set(users_df_ring.loc[users_df_ring["is_fraudster"], "user_id"])
 
-    # Get subgraph of fraudsters and their connections
-    fraud_nodes = [
+    # Fraudsters plus the devices any of them use, in graph order so the seeded
+    # layout is reproducible; the set is only used for membership tests
+    device_nodes = [
         n
-        for n in G.nodes()
-        if n in fraudsters
-        or (
-            G.nodes[n].get("node_type") == "device"
-            and any(neighbor in fraudsters for neighbor in G.neighbors(n))
-        )
+        for n, t in nx.get_node_attributes(G, "node_type").items()
+        if t == "device"
+    ]
+    fraud_adjacent_devices = [
+        d for d in device_nodes if not fraudster_set.isdisjoint(G.neighbors(d))
     ]
-    fraud_subgraph = G.subgraph(fraud_nodes)
+    fraud_nodes = [n for n in G if n in fraudster_set] + fraud_adjacent_devices
+
+    # Copy the ring into a standalone graph once, so layout and drawing do not
+    # re-filter G on every node and edge lookup as a subgraph view would
+    fraud_node_set = set(fraud_nodes)
+    fraud_subgraph = nx.Graph()
+    fraud_subgraph.add_nodes_from((n, G.nodes[n]) for n in fraud_nodes)
+    fraud_subgraph.add_edges_from(
+        (u, v, d)
+        for u, v, d in G.edges(fraud_nodes, data=True)
+        if v in fraud_node_set
+    )
 
     # Create visualization
     fig_fraud_net, ax_fraud_net = plt.subplots(figsize=(14, 10))
 
-    # Layout
-    pos = nx.spring_layout(fraud_subgraph, k=2, iterations=50, seed=42)
+    # Layout: igraph's C Fruchterman-Reingold when available, NetworkX otherwise
+    try:
+        import igraph as ig
+
+        g_ig = ig.Graph.from_networkx(fraud_subgraph)
+        layout = g_ig.layout_fruchterman_reingold(
+            niter=50,
+            seed=np.random.default_rng(42).random((g_ig.vcount(), 2)).tolist(),
+        )
+        pos = {n: layout[i] for i, n in enumerate(fraud_subgraph.nodes())}
+    except ImportError:
+        pos = nx.spring_layout(fraud_subgraph, k=2, iterations=50, seed=42)
 
     # Node colors
     node_colors = []
@@ -541,13 +579,12 @@ def __(G, dataset, mo, nx, plt):
     )
     ax_fraud_net.axis("off")
 
-    plt.tight_layout()
-    fig_fraud_net_final = plt.gcf()
-    plt.close()
+    fig_fraud_net.tight_layout()
+    plt.close(fig_fraud_net)
 
     mo.md(
         f"""
-    {mo.as_html(fig_fraud_net_final)}
+    {mo.as_html(fig_fraud_net)}
 
     **Network Structure:**
     - Red nodes = Fraudsters
@@ -559,11 +596,12 @@ def __(G, dataset, mo, nx, plt):
     return (
         ax_fraud_net,
         fig_fraud_net,
-        fig_fraud_net_final,
+        device_nodes,
+        fraud_adjacent_devices,
+        fraud_node_set,
         fraud_nodes,
         fraud_subgraph,
-        fraudsters,
-        neighbor,
+        fraudster_set,
         node,
         node_colors,
         pos,
@@ -0,0 +1,39 @@
+"""Disk cache for the NetworkX graphs built by the presentation scripts.
+
+A cached graph is reused until one of the raw tables (CSV or Parquet) or the
+script that builds it is modified.
+"""
+
+import os
+import pickle
+from pathlib import Path
+
+import config
+
+RAW_TABLES = ["users", "devices", "user_devices", "transactions"]
+
+
+def _inputs_mtime(build):
+    paths = [
+        config.RAW_DATA_DIR / f"{name}.{ext}"
+        for name in RAW_TABLES
+        for ext in ("csv", "parquet")
+    ]
+    paths.append(Path(build.__code__.co_filename))
+    return max(p.stat().st_mtime for p in paths if p.exists())
+
+
+def load_or_build(build, name):
+    """Return the graph pickled as data/cache/<name>.gpickle, or build and cache it."""
+    cache = config.DATA_DIR / "cache" / f"{name}.gpickle"
+    if cache.exists() and cache.stat().st_mtime >= _inputs_mtime(build):
+        with open(cache, "rb") as f:
+            return pickle.load(f)
+
+    G = build()
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache.with_suffix(".gpickle.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(G, f, protocol=5)
+    os.replace(tmp_path, cache)
+    return G
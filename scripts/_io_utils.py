@@ -0,0 +1,46 @@
+"""Input helpers shared by the presentation scripts."""
+
+import functools
+import os
+
+import pandas as pd
+
+import config
+
+
+def latest_risk_file():
+    """Return the path of the newest outputs/risk_scores_<timestamp>.csv.
+
+    The timestamped names sort chronologically, so the newest file is the
+    greatest name; one scandir pass finds it without globbing, stats or sorting.
+    """
+    best = None
+    try:
+        with os.scandir(config.OUTPUTS_DIR) as it:
+            for entry in it:
+                name = entry.name
+                if (
+                    name.startswith("risk_scores_")
+                    and name.endswith(".csv")
+                    and (best is None or name > best.name)
+                ):
+                    best = entry
+    except FileNotFoundError:
+        pass
+    if best is None:
+        raise FileNotFoundError("No risk_scores CSV found in outputs/")
+    return best.path
+
+
+@functools.lru_cache(maxsize=4)
+def load_risk_scores(path):
+    """Read the user_id and risk_score columns of a risk scores CSV, once per path.
+
+    A missing column is simply absent from the frame. The frame is shared
+    between callers, so treat it as read-only.
+    """
+    return pd.read_csv(
+        path,
+        usecols=lambda c: c in ("user_id", "risk_score"),
+        dtype={"user_id": str, "risk_score": "float32"},
+    )
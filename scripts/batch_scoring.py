@@ -8,8 +8,6 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-import pandas as pd
-import json
 from datetime import datetime
 import config
 from src.models.neo4j_graph_builder import Neo4jFraudGraph
@@ -18,18 +16,18 @@ from src.models.fraud_detector import FraudDetector
 
 
 def load_latest_dataset():
-    """Load latest dataset from DVC"""
+    """Load latest dataset from DVC, preferring the Parquet copies"""
     print("Loading dataset...")
     dataset = {}
     for name in ["users", "devices", "user_devices", "transactions"]:
-        file_path = config.RAW_DATA_DIR / f"{name}.csv"
-        dataset[name] = pd.read_csv(file_path)
+        dataset[name] = config.load_table(name)
     return dataset
 
 
 def batch_score_users():
     """Score all users and generate reports"""
     print("=== Batch Scoring Pipeline ===\n")
+    config.ensure_dirs()
 
     # Connect to Neo4j
     print("Connecting to Neo4j...")
@@ -44,9 +42,9 @@ def batch_score_users():
     nx_graph = FraudGraph()
     nx_graph.build_from_dataset(dataset)
 
-    # Initialize detector
+    # Initialize detector; Louvain and PageRank run in Neo4j when GDS is installed
     print("Running fraud detection...")
-    detector = FraudDetector(nx_graph)
+    detector = FraudDetector(nx_graph, gds_graph=neo4j_graph)
     report = detector.generate_fraud_report(
         dataset["transactions"], risk_threshold=config.RISK_THRESHOLD
     )
@@ -66,19 +64,10 @@ def batch_score_users():
     risk_scores.to_csv(output_path, index=False)
     print(f"\n  Saved risk scores: {output_path}")
 
-    # Save high-risk users list
-    high_risk_output = config.OUTPUTS_DIR / f"high_risk_users_{timestamp}.json"
-    with open(high_risk_output, "w") as f:
-        json.dump(
-            {
-                "timestamp": datetime.now().isoformat(),
-                "risk_threshold": config.RISK_THRESHOLD,
-                "high_risk_users": high_risk_users,
-                "count": len(high_risk_users),
-            },
-            f,
-            indent=2,
-        )
+    # Save high-risk users list, in the same format as the daily DAG
+    high_risk_output, _ = config.save_high_risk_users(
+        risk_scores, high_risk_users, config.RISK_THRESHOLD, timestamp
+    )
     print(f"  Saved high-risk list: {high_risk_output}")
 
     # Close connection
@@ -13,6 +13,7 @@ This script uses only the Python standard library to avoid extra dependencies.
 """
 import json
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import urllib.request
 import urllib.error
 import sys
@@ -47,30 +48,36 @@ def check_http(url, timeout=5):
 
 
 def docker_ps(names):
-    out = {}
-    for name in names:
-        try:
-            cmd = [
-                "docker",
-                "ps",
-                "--filter",
-                f"name={name}",
-                "--format",
-                "{{.Names}} {{.Status}}",
-            ]
-            p = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            out[name] = p.stdout.strip() or "not running"
-        except Exception as e:
-            out[name] = f"error: {e}"
-    return out
+    # One docker CLI call for all containers, filtered here by exact name
+    try:
+        cmd = [
+            "docker",
+            "ps",
+            "--no-trunc",
+            "--format",
+            "{{.Names}}\t{{.Status}}",
+        ]
+        p = subprocess.run(cmd, capture_output=True, text=True, check=False)
+    except Exception as e:
+        return {name: f"error: {e}" for name in names}
+
+    running = dict(
+        line.split("\t", 1) for line in p.stdout.splitlines() if "\t" in line
+    )
+    return {
+        name: f"{name} {running[name]}" if name in running else "not running"
+        for name in names
+    }
 
 
 def main():
     results = {}
     print("Checking HTTP services:")
     any_fail = False
-    for k, url in SERVICES.items():
-        ok, info = check_http(url)
+    # Probe all services at once so the total wait is one timeout, not their sum
+    with ThreadPoolExecutor(max_workers=len(SERVICES)) as ex:
+        checks = dict(zip(SERVICES, ex.map(check_http, SERVICES.values())))
+    for k, (ok, info) in checks.items():
         results[k] = {"ok": ok, "info": info}
         status = "OK" if ok else "FAIL"
         print(f" - {k}: {status}")
@@ -9,6 +9,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import config
 from src.data.generate_dataset import FraudDatasetGenerator
@@ -17,6 +18,7 @@ from src.data.generate_dataset import FraudDatasetGenerator
 def generate_and_save_dataset():
     """Generate synthetic fraud dataset and save with versioning"""
     print("=== Fraud Detection Data Generation ===\n")
+    config.ensure_dirs()
     print("Configuration:")
     print(f"  Seed: {config.SEED}")
     print(f"  N Users: {config.N_USERS}")
@@ -31,12 +33,13 @@ def generate_and_save_dataset():
         n_users=config.N_USERS, n_transactions=config.N_TRANSACTIONS
     )
 
-    # Save to CSV files
+    # Save to CSV files, each with a Parquet copy for faster loading. The
+    # pyarrow writers release the GIL, so the tables are written concurrently
     print(f"\nSaving dataset to {config.RAW_DATA_DIR}/...")
+    with ThreadPoolExecutor(max_workers=len(dataset)) as ex:
+        list(ex.map(config.save_table, dataset.keys(), dataset.values()))
     for name, df in dataset.items():
-        output_path = config.RAW_DATA_DIR / f"{name}.csv"
-        df.to_csv(output_path, index=False)
-        print(f"  Saved {name}.csv: {len(df)} records")
+        print(f"  Saved {name}.csv/.parquet: {len(df)} records")
 
     # Create dataset metadata
     metadata = {
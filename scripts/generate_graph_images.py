@@ -6,94 +6,179 @@ Produces images in docs/images/:
  - graph_communities.png      (nodes colored by detected community)
  - transaction_path.png       (path-of-transactions subgraph for a high-risk user)
 
-The script builds a NetworkX graph from `data/raw/users.csv`, `data/raw/devices.csv`,
-`data/raw/user_devices.csv`, and `data/raw/transactions.csv` and uses the latest
-risk_scores CSV to highlight high-risk users.
+The script builds a NetworkX graph from the users, devices, user_devices and
+transactions tables in `data/raw/` (Parquet, or CSV when no fresh Parquet copy
+exists) and uses the latest risk_scores CSV to highlight high-risk users.
 """
 from pathlib import Path
-import glob
+import random
 import sys
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
 import pandas as pd
 import networkx as nx
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+
+# igraph's C core handles components, Louvain, neighborhoods and layouts when installed
+try:
+    import igraph as ig
+except ImportError:
+    ig = None
 
 ROOT = Path(__file__).resolve().parent.parent
 OUT_DIR = ROOT / "docs" / "images"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# Ensure repo root is on sys.path so `import config` works when running the script directly
+sys.path.insert(0, str(ROOT))
+import config  # noqa: E402
+from _graph_cache import load_or_build  # noqa: E402
+from _io_utils import latest_risk_file, load_risk_scores  # noqa: E402
 
-def latest_risk_file():
-    files = sorted(glob.glob(str(ROOT / "outputs" / "risk_scores_*.csv")))
-    if not files:
-        raise FileNotFoundError("No risk_scores CSV found in outputs/")
-    return files[-1]
 
-
-def build_graph():
-    users = pd.read_csv(ROOT / "data" / "raw" / "users.csv")
-    devices = pd.read_csv(ROOT / "data" / "raw" / "devices.csv")
-    user_devices = pd.read_csv(ROOT / "data" / "raw" / "user_devices.csv")
-    tx = pd.read_csv(ROOT / "data" / "raw" / "transactions.csv")
+def build_base_graph():
+    """Users, devices and user-device edges."""
+    # Only the id columns are read, from the Parquet copies when present
+    users = config.load_table("users", columns=["user_id"])
+    devices = config.load_table("devices", columns=["device_id"])
+    user_devices = config.load_table("user_devices", columns=["user_id", "device_id"])
 
     G = nx.Graph()
 
-    # Add user and device nodes with type attribute
-    for _, r in users.iterrows():
-        G.add_node(f"u_{r['user_id']}", label=str(r["user_id"]), type="user")
-    for _, r in devices.iterrows():
-        G.add_node(f"d_{r['device_id']}", label=str(r["device_id"]), type="device")
-
-    # User-device edges
-    for _, r in user_devices.iterrows():
-        u = f"u_{r['user_id']}"
-        d = f"d_{r['device_id']}"
-        if G.has_node(u) and G.has_node(d):
-            G.add_edge(u, d, type="uses")
-
-    # Transaction edges between users (undirected for visualization)
-    for _, r in tx.iterrows():
-        u1 = f"u_{r['sender_id']}" if "sender_id" in r else f"u_{r['user_id_from']}"
-        u2 = f"u_{r['receiver_id']}" if "receiver_id" in r else f"u_{r['user_id_to']}"
-        if G.has_node(u1) and G.has_node(u2):
-            G.add_edge(u1, u2, type="transaction")
+    # Node labels are built once per id; edges pick them by position, so every
+    # edge endpoint reuses its node's key string instead of a new one per row
+    user_ids = pd.Index(users["user_id"].astype(str).unique())
+    device_ids = pd.Index(devices["device_id"].astype(str).unique())
+    user_labels = ("u_" + user_ids).to_numpy()
+    device_labels = ("d_" + device_ids).to_numpy()
+    G.add_nodes_from(
+        (lbl, {"label": i, "type": "user"}) for lbl, i in zip(user_labels, user_ids)
+    )
+    G.add_nodes_from(
+        (lbl, {"label": i, "type": "device"})
+        for lbl, i in zip(device_labels, device_ids)
+    )
+
+    # User-device edges whose endpoints are both known nodes (-1 = unknown)
+    u = user_ids.get_indexer(user_devices["user_id"].astype(str))
+    d = device_ids.get_indexer(user_devices["device_id"].astype(str))
+    known = (u >= 0) & (d >= 0)
+    G.add_edges_from(zip(user_labels[u[known]], device_labels[d[known]]), type="uses")
 
     return G
 
 
-def draw_overview(G, path=None):
-    plt.figure(figsize=(8, 6))
+def add_transaction_edges(G):
+    """Add undirected user-user transaction edges between users already in G."""
+    tx = config.load_table("transactions", columns=["sender_id", "receiver_id"])
+    users = [(n, d["label"]) for n, d in G.nodes(data=True) if d.get("type") == "user"]
+    user_labels = np.array([n for n, _ in users], dtype=object)
+    user_ids = pd.Index([i for _, i in users])
+
+    s = user_ids.get_indexer(tx["sender_id"].astype(str))
+    r = user_ids.get_indexer(tx["receiver_id"].astype(str))
+    known = (s >= 0) & (r >= 0)
+    G.add_edges_from(
+        zip(user_labels[s[known]], user_labels[r[known]]), type="transaction"
+    )
+
+
+def build_graph():
+    # Transactions are the only user-user edges, which the overview's largest
+    # component, the community projection and the path neighborhood all use
+    G = build_base_graph()
+    add_transaction_edges(G)
+    return G
+
+
+def to_igraph(G):
+    """Copy G into an igraph.Graph with integer edges; node ids go in vs["name"]."""
+    names = list(G.nodes())
+    index = {n: i for i, n in enumerate(names)}
+    g = ig.Graph(
+        n=len(names), edges=[(index[u], index[v]) for u, v in G.edges()], directed=False
+    )
+    g.vs["name"] = names
+    return g
+
+
+def layout(sub, seed, g=None):
+    """Force-directed positions for sub; igraph's C Fruchterman-Reingold if g is set."""
+    if g is None:
+        return nx.spring_layout(sub, seed=seed)
+    gs = g.induced_subgraph(g.vs.select(name_in=set(sub.nodes())))
+    # A seeded generator keeps the layout reproducible, like spring_layout's seed;
+    # igraph's generator is process-wide, so put back its default (the random
+    # module) afterwards
+    ig.set_random_number_generator(random.Random(seed))
+    try:
+        coords = gs.layout_fruchterman_reingold()
+    finally:
+        ig.set_random_number_generator(random)
+    return dict(zip(gs.vs["name"], coords.coords))
+
+
+def draw_nodes(ax, pos, nodes, **kwargs):
+    """Draw nodes as one scatter PathCollection above the edges."""
+    xy = np.array([pos[n] for n in nodes], dtype=float).reshape(-1, 2)
+    ax.scatter(xy[:, 0], xy[:, 1], zorder=2, **kwargs)
+
+
+def draw_edges(ax, G, pos, **kwargs):
+    """Draw all edges of G as one LineCollection below the nodes."""
+    segments = np.array([(pos[u], pos[v]) for u, v in G.edges()], dtype=float)
+    segments = segments.reshape(-1, 2, 2)
+    kwargs.setdefault("linewidths", 1.0)
+    ax.add_collection(LineCollection(segments, colors="k", zorder=1, **kwargs))
+    if len(segments):
+        # 5% padding around the edges, as nx.draw_networkx_edges does
+        lo, hi = segments.min(axis=(0, 1)), segments.max(axis=(0, 1))
+        pad = 0.05 * (hi - lo)
+        ax.update_datalim([lo - pad, hi + pad])
+    ax.autoscale_view()
+
+
+def node_types(sub):
+    """Node ids and their "type" attributes as aligned arrays, read in one pass."""
+    pairs = list(sub.nodes(data="type"))
+    nodes = np.array([n for n, _ in pairs], dtype=object)
+    types = np.array([t for _, t in pairs], dtype=object)
+    return nodes, types
+
+
+def draw_overview(G, g=None):
+    fig, ax = plt.subplots(figsize=(8, 6))
     # take a subgraph: largest connected component's top 200 nodes for clarity
-    comps = sorted(nx.connected_components(G), key=len, reverse=True)
+    if g is not None:
+        comps = sorted(g.connected_components(), key=len, reverse=True)
+        comps = [[g.vs[i]["name"] for i in c] for c in comps]
+    else:
+        comps = sorted(nx.connected_components(G), key=len, reverse=True)
     nodes = list(comps[0])[:200] if comps else list(G.nodes())[:200]
     sub = G.subgraph(nodes)
 
-    pos = nx.spring_layout(sub, seed=42)
-    user_nodes = [n for n, d in sub.nodes(data=True) if d.get("type") == "user"]
-    device_nodes = [n for n, d in sub.nodes(data=True) if d.get("type") == "device"]
+    pos = layout(sub, seed=42, g=g)
+    sub_nodes, types = node_types(sub)
 
-    nx.draw_networkx_nodes(
-        sub, pos, nodelist=user_nodes, node_color="#2b8cbe", node_size=80, label="users"
-    )
-    nx.draw_networkx_nodes(
-        sub,
-        pos,
-        nodelist=device_nodes,
-        node_color="#7fc97f",
-        node_size=60,
-        label="devices",
+    draw_nodes(ax, pos, sub_nodes[types == "user"], c="#2b8cbe", s=80, label="users")
+    draw_nodes(
+        ax, pos, sub_nodes[types == "device"], c="#7fc97f", s=60, label="devices"
     )
     # draw edges lightly
-    nx.draw_networkx_edges(sub, pos, alpha=0.4, width=0.7)
-    plt.axis("off")
-    plt.title("Graph overview (users + devices + transactions)")
-    p = OUT_DIR / "graph_overview.png"
-    plt.tight_layout()
-    plt.savefig(p, dpi=150)
-    plt.close()
-    print("Wrote", p)
+    draw_edges(ax, sub, pos, alpha=0.4, linewidths=0.7)
+    ax.axis("off")
+    ax.set_title("Graph overview (users + devices + transactions)")
+    fig.tight_layout()
+    return fig, OUT_DIR / "graph_overview.png"
 
 
-def draw_communities(G):
+def draw_communities(G, g=None):
     # run a simple community detection on the user-only projection
     users = [n for n, d in G.nodes(data=True) if d.get("type") == "user"]
     U = G.subgraph(users)
@@ -102,88 +187,109 @@ def draw_communities(G):
         print("No user nodes for communities")
         return
 
-    try:
-        from networkx.algorithms.community import greedy_modularity_communities
-
-        comms = list(greedy_modularity_communities(U))
-    except Exception:
-        comms = []
-
-    # assign community id per user
-    com_map = {}
-    for i, c in enumerate(comms):
-        for n in c:
-            com_map[n] = i
+    # Louvain on the user-induced subgraph: igraph's C implementation when
+    # available, else NetworkX's (far cheaper than greedy modularity's merges)
+    if g is not None:
+        method = "Louvain (igraph)"
+        gu = g.induced_subgraph(g.vs.select(name_in=set(users)))
+        com_map = dict(zip(gu.vs["name"], gu.community_multilevel().membership))
+    else:
+        method = "Louvain"
+        comms = nx.community.louvain_communities(U, seed=42)
+        com_map = {n: i for i, c in enumerate(comms) for n in c}
 
     # prepare colors
-    import matplotlib.cm as cm
-
-    cmap = cm.get_cmap("tab20")
+    cmap = matplotlib.colormaps["tab20"]
 
     # pick a subgraph for drawing
     nodes = users[:200]
     sub = G.subgraph(nodes)
-    pos = nx.spring_layout(sub, seed=24)
-    colors = []
-    for n in sub.nodes():
-        if sub.nodes[n].get("type") == "device":
-            colors.append("#cccccc")
-        else:
-            cid = com_map.get(n, -1)
-            colors.append(cmap((cid % 20) / 20) if cid >= 0 else "#999999")
-
-    plt.figure(figsize=(8, 6))
-    nx.draw_networkx_nodes(sub, pos, node_color=colors, node_size=80)
-    nx.draw_networkx_edges(sub, pos, alpha=0.4)
-    plt.axis("off")
-    plt.title("User communities (detected via greedy modularity)")
-    p = OUT_DIR / "graph_communities.png"
-    plt.tight_layout()
-    plt.savefig(p, dpi=150)
-    plt.close()
-    print("Wrote", p)
-
-
-def draw_transaction_path(G, risk_df):
+    pos = layout(sub, seed=24, g=g)
+    sub_nodes, types = node_types(sub)
+    cids = np.array([com_map.get(n, -1) for n in sub_nodes], dtype=int)
+    colors = np.tile(to_rgba("#999999"), (len(sub_nodes), 1))
+    assigned = cids >= 0
+    colors[assigned] = cmap((cids[assigned] % 20) / 20)
+    colors[types == "device"] = to_rgba("#cccccc")
+
+    fig, ax = plt.subplots(figsize=(8, 6))
+    draw_nodes(ax, pos, sub_nodes, c=colors, s=80)
+    draw_edges(ax, sub, pos, alpha=0.4)
+    ax.axis("off")
+    ax.set_title(f"User communities (detected via {method})")
+    fig.tight_layout()
+    return fig, OUT_DIR / "graph_communities.png"
+
+
+def draw_transaction_path(G, risk_df, g=None):
     # pick highest-risk user id
-    hr = risk_df.sort_values("risk_score", ascending=False).head(1)
-    if hr.empty:
+    if risk_df["risk_score"].isna().all():
         print("No high-risk users found")
         return
-    uid = str(hr.iloc[0]["user_id"])
+    top = risk_df.loc[risk_df["risk_score"].idxmax()]
+    uid = str(top["user_id"])
     node = f"u_{uid}"
     if not G.has_node(node):
         print("High-risk user node not found in graph:", node)
         return
 
     # get neighborhood up to 3 hops
-    nodes = nx.single_source_shortest_path_length(G, node, cutoff=3).keys()
+    if g is not None:
+        nodes = [g.vs[i]["name"] for i in g.neighborhood(node, order=3)]
+    else:
+        # level-by-level BFS collecting only the node set, no distance dict
+        nodes = {node}
+        frontier = {node}
+        for _ in range(3):
+            frontier = {nbr for n in frontier for nbr in G.adj[n]} - nodes
+            nodes |= frontier
     sub = G.subgraph(nodes)
-    pos = nx.spring_layout(sub, seed=7)
+    pos = layout(sub, seed=7, g=g)
 
-    plt.figure(figsize=(8, 6))
+    fig, ax = plt.subplots(figsize=(8, 6))
     # highlight the path center
-    node_colors = []
-    for n in sub.nodes():
-        if n == node:
-            node_colors.append("#d73027")
-        elif sub.nodes[n].get("type") == "device":
-            node_colors.append("#fdae61")
-        else:
-            node_colors.append("#4575b4")
-
-    nx.draw_networkx_nodes(sub, pos, node_color=node_colors, node_size=120)
-    nx.draw_networkx_edges(sub, pos, width=1.0, alpha=0.6)
+    sub_nodes, types = node_types(sub)
+    node_colors = np.where(types == "device", "#fdae61", "#4575b4").astype(object)
+    node_colors[sub_nodes == node] = "#d73027"
+
+    draw_nodes(ax, pos, sub_nodes, c=node_colors, s=120)
+    draw_edges(ax, sub, pos, linewidths=1.0, alpha=0.6)
     nx.draw_networkx_labels(
-        sub, pos, {n: sub.nodes[n].get("label", "") for n in sub.nodes()}, font_size=8
+        sub,
+        pos,
+        {n: sub.nodes[n].get("label", "") for n in sub.nodes()},
+        font_size=8,
+        ax=ax,
     )
-    plt.axis("off")
-    plt.title(f"Transaction neighborhood for high-risk user {uid}")
-    p = OUT_DIR / "transaction_path.png"
-    plt.tight_layout()
-    plt.savefig(p, dpi=150)
-    plt.close()
-    print("Wrote", p)
+    ax.axis("off")
+    ax.set_title(f"Transaction neighborhood for high-risk user {uid}")
+    fig.tight_layout()
+    return fig, OUT_DIR / "transaction_path.png"
+
+
+def save_figure(fig, path):
+    fig.savefig(path, dpi=150)
+    print("Wrote", path)
+
+
+def render(name, risk_path):
+    """Draw and save one image in a worker process.
+
+    Only the image name and the risk CSV path are sent to the worker; it reads
+    the graph from the disk cache that main has just written.
+    """
+    G = load_or_build(build_graph, "graph_images")
+    g = to_igraph(G) if ig is not None else None
+    if name == "overview":
+        drawn = draw_overview(G, g=g)
+    elif name == "communities":
+        drawn = draw_communities(G, g=g)
+    else:
+        drawn = draw_transaction_path(G, load_risk_scores(risk_path), g=g)
+    if drawn is not None:
+        fig, path = drawn
+        save_figure(fig, path)
+        plt.close(fig)
 
 
 def main():
@@ -193,11 +299,15 @@ def main():
         print(e)
         sys.exit(1)
 
-    risk_df = pd.read_csv(rf)
-    G = build_graph()
-    draw_overview(G)
-    draw_communities(G)
-    draw_transaction_path(G, risk_df)
+    # Build (or refresh) the cached graph once, before the workers read it
+    load_or_build(build_graph, "graph_images")
+
+    # Each image is CPU-bound layout + rendering. Spawned workers start clean
+    # (no forked threads) and work on every platform
+    images = ["overview", "communities", "path"]
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(images), mp_context=ctx) as pool:
+        list(pool.map(render, images, [str(rf)] * len(images)))
 
 
 if __name__ == "__main__":
@@ -7,40 +7,72 @@ Note: pyvis may not be installed in the environment. Install with `uv sync` or
 add to the project venv if you want to render interactively.
 """
 from pathlib import Path
-import glob
 import sys
+import numpy as np
 import pandas as pd
 
 ROOT = Path(__file__).resolve().parent.parent
 OUT = ROOT / "docs" / "graph_interactive.html"
 
+# Ensure repo root is on sys.path so `import config` works when running the script directly
+sys.path.insert(0, str(ROOT))
+import config  # noqa: E402
+from _graph_cache import load_or_build  # noqa: E402
+from _io_utils import latest_risk_file  # noqa: E402
 
-def latest_risk_file():
-    files = sorted(glob.glob(str(ROOT / "outputs" / "risk_scores_*.csv")))
-    if not files:
-        raise FileNotFoundError("No risk_scores CSV found in outputs/")
-    return files[-1]
+
+def _node_labels(ids, index, labels, prefix):
+    """Map string ids to the prebuilt labels at their position in index.
+
+    Ids missing from index get a new prefixed label (add_edges_from then adds
+    them as bare nodes, as before).
+    """
+    codes = index.get_indexer(ids)
+    known = codes >= 0
+    out = np.empty(len(ids), dtype=object)
+    out[known] = labels[codes[known]]
+    out[~known] = (prefix + ids[~known]).to_numpy()
+    return out
 
 
 def build_network():
     import networkx as nx
 
-    users = pd.read_csv(ROOT / "data" / "raw" / "users.csv")
-    devices = pd.read_csv(ROOT / "data" / "raw" / "devices.csv")
-    user_devices = pd.read_csv(ROOT / "data" / "raw" / "user_devices.csv")
-    tx = pd.read_csv(ROOT / "data" / "raw" / "transactions.csv")
+    # Only the id columns are read, from the Parquet copies when present
+    users = config.load_table("users", columns=["user_id"])
+    devices = config.load_table("devices", columns=["device_id"])
+    user_devices = config.load_table("user_devices", columns=["user_id", "device_id"])
+    tx = config.load_table("transactions", columns=["sender_id", "receiver_id"])
 
     G = nx.Graph()
-    for _, r in users.iterrows():
-        G.add_node(f"u_{r['user_id']}", label=str(r["user_id"]), group="user")
-    for _, r in devices.iterrows():
-        G.add_node(f"d_{r['device_id']}", label=str(r["device_id"]), group="device")
-    for _, r in user_devices.iterrows():
-        G.add_edge(f"u_{r['user_id']}", f"d_{r['device_id']}")
-    for _, r in tx.iterrows():
-        # assume sender_id / receiver_id
-        if "sender_id" in r and "receiver_id" in r:
-            G.add_edge(f"u_{r['sender_id']}", f"u_{r['receiver_id']}")
+    # Labels are built once per id and shared by every edge endpoint
+    user_ids = pd.Index(users["user_id"].astype(str).unique())
+    device_ids = pd.Index(devices["device_id"].astype(str).unique())
+    user_labels = ("u_" + user_ids).to_numpy()
+    device_labels = ("d_" + device_ids).to_numpy()
+    G.add_nodes_from(
+        (lbl, {"label": i, "group": "user"}) for lbl, i in zip(user_labels, user_ids)
+    )
+    G.add_nodes_from(
+        (lbl, {"label": i, "group": "device"})
+        for lbl, i in zip(device_labels, device_ids)
+    )
+    G.add_edges_from(
+        zip(
+            _node_labels(
+                user_devices["user_id"].astype(str), user_ids, user_labels, "u_"
+            ),
+            _node_labels(
+                user_devices["device_id"].astype(str), device_ids, device_labels, "d_"
+            ),
+        )
+    )
+    G.add_edges_from(
+        zip(
+            _node_labels(tx["sender_id"].astype(str), user_ids, user_labels, "u_"),
+            _node_labels(tx["receiver_id"].astype(str), user_ids, user_labels, "u_"),
+        )
+    )
     return G
 
 
@@ -60,7 +92,7 @@ def main():
         print("Error:", e)
         sys.exit(1)
 
-    G = build_network()
+    G = load_or_build(build_network, "graph_interactive")
     net = Network(height="800px", width="100%", notebook=False)
     net.from_nx(G)
     net.show(str(OUT))
@@ -10,8 +10,9 @@ This script uses only common plotting libs available in the repo venv (matplotli
 """
 import sys
 from pathlib import Path
-import glob
-import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
 
@@ -21,22 +22,17 @@ OUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # Ensure repo root is on sys.path so `import config` works when running the script directly
 sys.path.insert(0, str(ROOT))
-import config
-
-
-def latest_risk_file():
-    files = sorted(glob.glob(str(ROOT / "outputs" / "risk_scores_*.csv")))
-    if not files:
-        raise FileNotFoundError("No risk_scores CSV found in outputs/")
-    return files[-1]
+import config  # noqa: E402
+from _io_utils import latest_risk_file, load_risk_scores  # noqa: E402
 
 
 def check_inputs():
     """Check that required input files exist and print friendly messages if not."""
     missing = []
     # check outputs risk file
-    files = sorted(glob.glob(str(ROOT / "outputs" / "risk_scores_*.csv")))
-    if not files:
+    try:
+        latest_risk_file()
+    except FileNotFoundError:
         missing.append(
             "No risk_scores CSV found in 'outputs/'. Run the training or batch_scoring scripts first."
         )
@@ -59,70 +55,64 @@ def check_inputs():
         sys.exit(3)
 
 
-def plot_risk_hist(df):
-    plt.figure(figsize=(6, 4))
+def save_plot(ax, name):
+    p = OUT_DIR / name
+    ax.figure.tight_layout()
+    ax.figure.savefig(p, dpi=150)
+    print("Wrote", p)
+
+
+def plot_risk_hist(df, ax):
+    ax.clear()
     scores = df["risk_score"].clip(0, 1)
-    plt.hist(scores, bins=20, color="#2b8cbe", edgecolor="k")
+    ax.hist(scores, bins=20, color="#2b8cbe", edgecolor="k")
     # mark risk threshold
     try:
         thr = config.RISK_THRESHOLD
-        plt.axvline(thr, color="red", linestyle="--", linewidth=1)
-        plt.text(
-            thr + 0.01, plt.gca().get_ylim()[1] * 0.9, f"Threshold={thr}", color="red"
-        )
+        ax.axvline(thr, color="red", linestyle="--", linewidth=1)
+        ax.text(thr + 0.01, ax.get_ylim()[1] * 0.9, f"Threshold={thr}", color="red")
     except Exception:
         pass
-    plt.title("Distribution of risk scores")
-    plt.xlabel("Risk score")
-    plt.ylabel("Number of users")
-    plt.grid(axis="y", alpha=0.4)
-    p = OUT_DIR / "risk_hist.png"
-    plt.tight_layout()
-    plt.savefig(p, dpi=150)
-    plt.close()
-    print("Wrote", p)
+    ax.set_title("Distribution of risk scores")
+    ax.set_xlabel("Risk score")
+    ax.set_ylabel("Number of users")
+    ax.grid(axis="y", alpha=0.4)
+    save_plot(ax, "risk_hist.png")
 
 
-def plot_top_users(df, n=10):
-    top = df.sort_values("risk_score", ascending=False).head(n)
-    plt.figure(figsize=(6, 4))
-    bars = plt.barh(
+def plot_top_users(df, ax, n=10):
+    ax.clear()
+    top = df.nlargest(n, "risk_score")
+    bars = ax.barh(
         top["user_id"].astype(str)[::-1], top["risk_score"][::-1], color="#f46d43"
     )
-    plt.xlabel("Risk score")
-    plt.title(f"Top {n} highest-risk users")
+    ax.set_xlabel("Risk score")
+    ax.set_title(f"Top {n} highest-risk users")
     # annotate bar values
     for bar in bars:
         w = bar.get_width()
-        plt.text(w + 0.005, bar.get_y() + bar.get_height() / 2, f"{w:.2f}", va="center")
+        ax.text(w + 0.005, bar.get_y() + bar.get_height() / 2, f"{w:.2f}", va="center")
     # highlight the top user
     try:
         top_user = str(top.iloc[0]["user_id"])
-        plt.gca().yaxis.get_ticklabels()[-1].set_weight("bold")
+        ax.yaxis.get_ticklabels()[-1].set_weight("bold")
     except Exception:
         pass
-    plt.tight_layout()
-    p = OUT_DIR / "top_users.png"
-    plt.savefig(p, dpi=150)
-    plt.close()
-    print("Wrote", p)
+    save_plot(ax, "top_users.png")
 
 
-def plot_device_sharing():
+def plot_device_sharing(ax):
     # Read user_devices to compute how many users share the same device
-    ud = pd.read_csv(ROOT / "data" / "raw" / "user_devices.csv")
-    # columns expected: user_id, device_id
-    counts = ud.groupby("device_id")["user_id"].nunique().sort_values(ascending=False)
+    ud = config.load_table("user_devices", columns=["user_id", "device_id"])
+    # Distinct users per device: drop repeated links, then one hash count over
+    # device_id (value_counts sorts descending)
+    counts = ud.drop_duplicates()["device_id"].value_counts()
     top = counts.head(10)
-    plt.figure(figsize=(6, 4))
-    plt.barh(top.index.astype(str)[::-1], top.values[::-1], color="#7fc97f")
-    plt.xlabel("Number of distinct users")
-    plt.title("Top devices by number of associated users")
-    plt.tight_layout()
-    p = OUT_DIR / "device_sharing.png"
-    plt.savefig(p, dpi=150)
-    plt.close()
-    print("Wrote", p)
+    ax.clear()
+    ax.barh(top.index.astype(str)[::-1], top.values[::-1], color="#7fc97f")
+    ax.set_xlabel("Number of distinct users")
+    ax.set_title("Top devices by number of associated users")
+    save_plot(ax, "device_sharing.png")
 
 
 def main():
@@ -132,18 +122,21 @@ def main():
         print(e)
         sys.exit(1)
 
-    df = pd.read_csv(file)
+    df = load_risk_scores(file)
     # Ensure required columns exist
     if "risk_score" not in df.columns or "user_id" not in df.columns:
         print("risk_scores CSV missing expected columns")
         sys.exit(1)
 
-    plot_risk_hist(df)
-    plot_top_users(df, n=10)
+    # One figure is cleared and redrawn for each plot (all are 6x4)
+    fig, ax = plt.subplots(figsize=(6, 4))
+    plot_risk_hist(df, ax)
+    plot_top_users(df, ax, n=10)
     try:
-        plot_device_sharing()
+        plot_device_sharing(ax)
     except Exception as e:
         print("Could not plot device sharing (missing file or columns):", e)
+    plt.close(fig)
 
 
 if __name__ == "__main__":
@@ -9,6 +9,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import mlflow
 import mlflow.pyfunc
+import numpy as np
 import pandas as pd
 import json
 from datetime import datetime
@@ -105,13 +106,15 @@ def train_and_evaluate(neo4j_graph, dataset, risk_threshold=None):
 
     # Calculate metrics
     risk_df = report["risk_scores"]
-    high_risk = risk_df[risk_df["risk_score"] > risk_threshold]
+    is_fraud = risk_df["is_fraudster"].to_numpy(dtype=bool)
+    high_mask = risk_df["risk_score"].to_numpy() > risk_threshold
 
-    true_positives = len(high_risk[high_risk["is_fraudster"]])
-    false_positives = len(high_risk[~high_risk["is_fraudster"]])
-    total_fraudsters = len(risk_df[risk_df["is_fraudster"]])
+    true_positives = int(np.count_nonzero(high_mask & is_fraud))
+    false_positives = int(np.count_nonzero(high_mask & ~is_fraud))
+    n_high_risk = true_positives + false_positives
+    total_fraudsters = int(np.count_nonzero(is_fraud))
 
-    precision = true_positives / len(high_risk) if len(high_risk) > 0 else 0
+    precision = true_positives / n_high_risk if n_high_risk > 0 else 0
     recall = true_positives / total_fraudsters if total_fraudsters > 0 else 0
     f1_score = (
         2 * (precision * recall) / (precision + recall)
@@ -119,12 +122,9 @@ def train_and_evaluate(neo4j_graph, dataset, risk_threshold=None):
         else 0
     )
 
-    # Detection breakdown
-    ring_members = sum(
-        1
-        for uid in report["high_risk_users"]
-        if risk_df[risk_df["user_id"] == uid]["device_risk"].values[0] > 0.5
-    )
+    # Detection breakdown: the high-risk users are exactly the high_mask rows
+    device_risk = risk_df["device_risk"].to_numpy()
+    ring_members = int(np.count_nonzero(device_risk[high_mask] > 0.5))
     solo_fraudsters = len(report["high_risk_users"]) - ring_members
 
     metrics = {
@@ -185,6 +185,7 @@ def save_model_artifacts(report, metrics, dataset_version):
 
 def main():
     print("=== Fraud Detection Training Pipeline ===\n")
+    config.ensure_dirs()
 
     # Set up MLflow
     mlflow.set_tracking_uri(config.MLFLOW_TRACKING_URI)
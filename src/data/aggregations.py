@@ -0,0 +1,34 @@
+"""Array-level aggregations over integer-coded dataset ids."""
+
+import numpy as np
+
+
+def count_device_fraudsters(
+    device_codes: np.ndarray, is_fraud: np.ndarray, n_devices: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Count users and fraudsters per device.
+
+    device_codes holds one dense device code (0..n_devices-1) per user-device
+    link, and is_fraud the fraud flag of that link's user.
+    """
+    user_count = np.bincount(device_codes, minlength=n_devices)
+    fraudsters = np.bincount(
+        device_codes, weights=is_fraud.astype(np.int64), minlength=n_devices
+    ).astype(np.int64)
+    return user_count, fraudsters
+
+
+def crosstab_code_flag(
+    codes: np.ndarray, flags: np.ndarray, n_codes: int
+) -> np.ndarray:
+    """Count rows per (code, flag) pair as an (n_codes, 2) matrix.
+
+    Column 0 counts rows whose flag is False, column 1 rows whose flag is True.
+    Each pair is packed into one integer key (code * 2 + flag).
+    """
+    keys, counts = np.unique(
+        codes.astype(np.int64) * 2 + flags.astype(np.int64), return_counts=True
+    )
+    table = np.zeros(n_codes * 2, dtype=np.int64)
+    table[keys] = counts
+    return table.reshape(n_codes, 2)
@@ -15,6 +15,7 @@ class FraudDatasetGenerator:
         """Initialize generator with random seed."""
         random.seed(seed)
         np.random.seed(seed)
+        self.rng = np.random.default_rng(seed)
         self.fraud_rings: List[List[int]] = []
 
     def generate_users(
@@ -23,26 +24,31 @@ class FraudDatasetGenerator:
         """Generate user entities."""
         n_fraudsters = int(n_users * fraud_rate)
 
-        users = []
-        for i in range(n_users):
-            users.append(
-                {
-                    "user_id": f"U{i:04d}",
-                    "is_fraudster": i < n_fraudsters,
-                    "account_age_days": (
-                        random.randint(1, 1000)
-                        if i >= n_fraudsters
-                        else random.randint(1, 90)
-                    ),
-                    "verification_level": (
-                        random.choice(["basic", "verified", "premium"])
-                        if i >= n_fraudsters
-                        else "basic"
-                    ),
-                }
-            )
+        # Whole columns are drawn at once; the first n_fraudsters are fraudsters
+        index = np.arange(n_users)
+        user_ids = np.char.add("U", np.char.zfill(index.astype(str), 4))
+        is_fraud = index < n_fraudsters
+
+        # Fraudsters have young, basic accounts
+        account_age_days = np.where(
+            is_fraud,
+            self.rng.integers(1, 91, n_users),
+            self.rng.integers(1, 1001, n_users),
+        )
+        verification_level = np.where(
+            is_fraud,
+            "basic",
+            self.rng.choice(["basic", "verified", "premium"], n_users),
+        )
 
-        return pd.DataFrame(users)
+        return pd.DataFrame(
+            {
+                "user_id": user_ids,
+                "is_fraudster": is_fraud,
+                "account_age_days": account_age_days,
+                "verification_level": verification_level,
+            }
+        )
 
     def generate_fraud_rings(
         self, users_df: pd.DataFrame, n_rings: int = 3
@@ -106,10 +112,11 @@ class FraudDatasetGenerator:
                     user_devices.append({"user_id": user_id, "device_id": device_name})
 
         # Other fraudsters: individual devices
+        in_ring = set().union(*self.fraud_rings)
         other_fraudsters = [
             uid
             for uid in users_df[users_df["is_fraudster"]]["user_id"].tolist()
-            if not any(uid in ring for ring in self.fraud_rings)
+            if uid not in in_ring
         ]
         for user_id in other_fraudsters:
             device_name = f"D{device_id:04d}"
@@ -134,56 +141,87 @@ class FraudDatasetGenerator:
         if start_date is None:
             start_date = datetime.now() - timedelta(days=180)
 
-        transactions = []
-        fraudsters = set(users_df[users_df["is_fraudster"]]["user_id"].tolist())
-        normal_users = users_df[~users_df["is_fraudster"]]["user_id"].tolist()
-
-        for i in range(n_transactions):
-            # Determine if transaction involves fraud
-            if random.random() < 0.3 and fraudsters:  # 30% fraud transactions
-                # Fraudster transactions
-                sender = random.choice(list(fraudsters))
-
-                # Fraud patterns
-                if random.random() < 0.6:  # Money mule pattern
-                    receiver = random.choice(normal_users)
-                else:  # Fraud ring internal
-                    same_ring = [ring for ring in self.fraud_rings if sender in ring]
-                    if same_ring:
-                        receiver = random.choice(same_ring[0])
-                    else:
-                        receiver = random.choice(list(fraudsters))
-
-                amount = random.uniform(100, 5000)  # Higher amounts
-                is_fraudulent = True
-            else:
-                # Normal transactions
-                sender = random.choice(normal_users)
-                receiver = random.choice(normal_users)
-                while receiver == sender:
-                    receiver = random.choice(normal_users)
-
-                amount = random.uniform(5, 500)  # Lower amounts
-                is_fraudulent = False
-
-            timestamp = start_date + timedelta(minutes=random.randint(0, 180 * 24 * 60))
-
-            transactions.append(
-                {
-                    "transaction_id": f"T{i:05d}",
-                    "sender_id": sender,
-                    "receiver_id": receiver,
-                    "amount": round(amount, 2),
-                    "timestamp": timestamp,
-                    "is_fraudulent": is_fraudulent,
-                    "status": random.choice(
-                        ["completed", "completed", "completed", "pending"]
-                    ),
-                }
+        rng = self.rng
+        n = n_transactions
+        fraudsters = users_df.loc[users_df["is_fraudster"], "user_id"].to_numpy()
+        normal_users = users_df.loc[~users_df["is_fraudster"], "user_id"].to_numpy()
+        if len(normal_users) < 2:
+            # Normal transactions need a sender and a different receiver
+            raise ValueError(
+                f"generate_transactions needs at least 2 non-fraudster users, "
+                f"got {len(normal_users)}"
             )
 
-        return (
-            pd.DataFrame(transactions).sort_values("timestamp").reset_index(drop=True)
+        # 30% fraud transactions
+        is_fraud = (rng.random(n) < 0.3) & (len(fraudsters) > 0)
+
+        # Normal transactions: a normal sender pays a different normal user
+        sender_idx = rng.integers(0, len(normal_users), n)
+        receiver_idx = (sender_idx + rng.integers(1, len(normal_users), n)) % len(
+            normal_users
+        )
+        senders = normal_users[sender_idx]
+        receivers = normal_users[receiver_idx]
+
+        if is_fraud.any():
+            fraud_rows = np.flatnonzero(is_fraud)
+            fraud_idx = rng.integers(0, len(fraudsters), len(fraud_rows))
+            senders[fraud_rows] = fraudsters[fraud_idx]
+
+            # Money mule pattern pays a normal user; otherwise the payment stays
+            # inside the sender's ring, or goes to any fraudster outside rings
+            mule = rng.random(len(fraud_rows)) < 0.6
+            fraud_receivers = normal_users[
+                rng.integers(0, len(normal_users), len(fraud_rows))
+            ]
+            fraud_receivers[~mule] = fraudsters[
+                rng.integers(0, len(fraudsters), (~mule).sum())
+            ]
+
+            # Ring members flattened, with each fraudster's ring start and size
+            ring_of = {
+                uid: r for r, ring in enumerate(self.fraud_rings) for uid in ring
+            }
+            sizes = np.array([len(ring) for ring in self.fraud_rings], dtype=int)
+            starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(int)
+            members = np.array(
+                [uid for ring in self.fraud_rings for uid in ring], dtype=object
+            )
+            sender_ring = np.array(
+                [ring_of.get(uid, -1) for uid in fraudsters], dtype=int
+            )[fraud_idx]
+            in_ring = ~mule & (sender_ring >= 0)
+            ring_ids = sender_ring[in_ring]
+            fraud_receivers[in_ring] = members[
+                starts[ring_ids] + rng.integers(0, sizes[ring_ids])
+            ]
+            receivers[fraud_rows] = fraud_receivers
+
+        amounts = np.where(
+            is_fraud,
+            rng.uniform(100, 5000, n),  # Higher amounts
+            rng.uniform(5, 500, n),  # Lower amounts
+        )
+        minutes = rng.integers(0, 180 * 24 * 60, n, endpoint=True)
+
+        transactions = pd.DataFrame(
+            {
+                "transaction_id": np.char.add(
+                    "T", np.char.zfill(np.arange(n).astype(str), 5)
+                ),
+                "sender_id": senders,
+                "receiver_id": receivers,
+                "amount": amounts.round(2),
+                "timestamp": pd.Timestamp(start_date)
+                + pd.to_timedelta(minutes, unit="m"),
+                "is_fraudulent": is_fraud,
+                "status": rng.choice(
+                    ["completed", "completed", "completed", "pending"], n
+                ),
+            }
+        )
+        return transactions.sort_values("timestamp", kind="stable").reset_index(
+            drop=True
         )
 
     def generate_dataset(
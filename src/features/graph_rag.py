@@ -1,7 +1,9 @@
 """Graph RAG - Query interface for fraud detection graph."""
 
-from typing import Dict, Any
+from typing import Any, Dict
 
+import networkx as nx
+import numpy as np
 import pandas as pd
 
 
@@ -15,6 +17,77 @@ class GraphRAG:
         self.dataset = dataset
         self.G = fraud_graph.G
         self.transaction_network = fraud_graph.transaction_network
+        # Detector results shared by queries, keyed by name
+        self._cache: dict[str, Any] = {}
+
+    def invalidate_cache(self) -> None:
+        """Drop memoized risk scores, shared resources, indexes and adjacency.
+
+        Call this after rebuilding or mutating the graph or the dataset.
+        """
+        self._cache.clear()
+
+    def _risk_data(self) -> tuple[list[dict], pd.DataFrame]:
+        """Return shared resources and risk scores, computed once per cache."""
+        if "risk" not in self._cache:
+            centrality_df = self.fraud_detector.calculate_centrality_scores()
+            shared_resources = self.fraud_detector.detect_shared_resources()
+            risk_df = self.fraud_detector.compute_risk_scores(
+                centrality_df, shared_resources, self.dataset["transactions"]
+            )
+            self._cache["risk"] = (shared_resources, risk_df)
+        return self._cache["risk"]
+
+    def _transaction_index(self) -> tuple[dict[str, Any], dict[str, Any]]:
+        """Return row positions of each user's sent and received transactions."""
+        if "transaction_index" not in self._cache:
+            transactions = self.dataset["transactions"]
+            self._cache["transaction_index"] = (
+                transactions.groupby("sender_id").indices,
+                transactions.groupby("receiver_id").indices,
+            )
+        return self._cache["transaction_index"]
+
+    def _node_sets(self) -> tuple[set, set]:
+        """Return the sets of user and device nodes in the graph."""
+        if "node_sets" not in self._cache:
+            users, devices = set(), set()
+            for node, node_type in self.G.nodes(data="node_type"):
+                if node_type == "user":
+                    users.add(node)
+                elif node_type == "device":
+                    devices.add(node)
+            self._cache["node_sets"] = (users, devices)
+        return self._cache["node_sets"]
+
+    def _adjacency(self) -> tuple[np.ndarray, dict[str, int], Any]:
+        """Return G's nodes, their row positions and its CSR adjacency matrix."""
+        if "adjacency" not in self._cache:
+            nodes = np.array(list(self.G.nodes()), dtype=object)
+            self._cache["adjacency"] = (
+                nodes,
+                {node: i for i, node in enumerate(nodes)},
+                nx.to_scipy_sparse_array(self.G, nodelist=nodes, format="csr"),
+            )
+        return self._cache["adjacency"]
+
+    def _neighborhood(self, user_id: str, depth: int) -> list[str]:
+        """Return the nodes within depth hops of user_id, in graph order.
+
+        Each hop expands the whole frontier at once by slicing its CSR rows;
+        the same nodes as FraudGraph.get_user_subgraph(user_id, depth).
+        """
+        nodes, index, adjacency = self._adjacency()
+        visited = np.zeros(len(nodes), dtype=bool)
+        frontier = np.array([index[user_id]])
+        visited[frontier] = True
+        for _ in range(depth):
+            reached = adjacency[frontier].indices
+            frontier = np.unique(reached[~visited[reached]])
+            if len(frontier) == 0:
+                break
+            visited[frontier] = True
+        return nodes[visited].tolist()
 
     def query(self, query_type: str, **kwargs) -> Dict[str, Any]:
         """Execute structured query on graph."""
@@ -41,30 +114,27 @@ class GraphRAG:
 
         user_attrs = self.G.nodes[user_id]
         neighbors = list(self.G.neighbors(user_id))
+        user_nodes, device_nodes = self._node_sets()
 
         # Get devices
-        devices = [n for n in neighbors if self.G.nodes[n].get("node_type") == "device"]
+        devices = [n for n in neighbors if n in device_nodes]
 
-        # Get transaction stats
-        user_txns = self.dataset["transactions"][
-            (self.dataset["transactions"]["sender_id"] == user_id)
-            | (self.dataset["transactions"]["receiver_id"] == user_id)
-        ]
+        # Get transaction stats; self-transfers count once in the total
+        sent_by, received_by = self._transaction_index()
+        sent = sent_by.get(user_id, np.empty(0, dtype=np.intp))
+        received = received_by.get(user_id, np.empty(0, dtype=np.intp))
+        n_self = len(np.intersect1d(sent, received, assume_unique=True))
 
         return {
             "user_id": user_id,
             "is_fraudster": user_attrs.get("is_fraudster"),
             "account_age_days": user_attrs.get("account_age_days"),
             "verification_level": user_attrs.get("verification_level"),
-            "connected_users": len(
-                [n for n in neighbors if self.G.nodes[n].get("node_type") == "user"]
-            ),
+            "connected_users": len([n for n in neighbors if n in user_nodes]),
             "devices": devices,
-            "total_transactions": len(user_txns),
-            "sent_transactions": len(user_txns[user_txns["sender_id"] == user_id]),
-            "received_transactions": len(
-                user_txns[user_txns["receiver_id"] == user_id]
-            ),
+            "total_transactions": len(sent) + len(received) - n_self,
+            "sent_transactions": len(sent),
+            "received_transactions": len(received),
         }
 
     def _query_user_connections(self, user_id: str, depth: int = 1) -> Dict[str, Any]:
@@ -72,18 +142,13 @@ class GraphRAG:
         if user_id not in self.G:
             return {"error": f"User {user_id} not found"}
 
-        subgraph = self.fraud_graph.get_user_subgraph(user_id, depth)
+        subgraph_nodes = self._neighborhood(user_id, depth)
+        user_nodes, device_nodes = self._node_sets()
 
-        users = [
-            n for n in subgraph.nodes() if subgraph.nodes[n].get("node_type") == "user"
-        ]
-        devices = [
-            n
-            for n in subgraph.nodes()
-            if subgraph.nodes[n].get("node_type") == "device"
-        ]
+        users = [n for n in subgraph_nodes if n in user_nodes]
+        devices = [n for n in subgraph_nodes if n in device_nodes]
 
-        fraudsters = [n for n in users if subgraph.nodes[n].get("is_fraudster")]
+        fraudsters = [n for n in users if self.G.nodes[n].get("is_fraudster")]
 
         return {
             "user_id": user_id,
@@ -93,16 +158,12 @@ class GraphRAG:
             "fraudsters_in_network": len([u for u in fraudsters if u != user_id]),
             "fraud_exposure_rate": len([u for u in fraudsters if u != user_id])
             / max(len(users) - 1, 1),
-            "subgraph_nodes": list(subgraph.nodes()),
+            "subgraph_nodes": subgraph_nodes,
         }
 
     def _query_fraud_risk(self, user_id: str) -> Dict[str, Any]:
         """Calculate fraud risk for user."""
-        centrality_df = self.fraud_detector.calculate_centrality_scores()
-        shared_resources = self.fraud_detector.detect_shared_resources()
-        risk_df = self.fraud_detector.compute_risk_scores(
-            centrality_df, shared_resources, self.dataset["transactions"]
-        )
+        shared_resources, risk_df = self._risk_data()
 
         user_risk = risk_df[risk_df["user_id"] == user_id]
 
@@ -169,12 +230,17 @@ class GraphRAG:
         if not communities:
             return {"error": "No communities detected"}
 
+        users = np.array(list(communities), dtype=object)
+        labels = np.fromiter(
+            communities.values(), dtype=np.int64, count=len(communities)
+        )
+
         if user_id:
             if user_id not in communities:
                 return {"error": f"User {user_id} not in any community"}
 
             community_id = communities[user_id]
-            community_members = [u for u, c in communities.items() if c == community_id]
+            community_members = users[labels == community_id].tolist()
 
             fraudsters = [
                 u for u in community_members if self.G.nodes[u].get("is_fraudster")
@@ -189,32 +255,30 @@ class GraphRAG:
                 "fraud_rate": len(fraudsters) / len(community_members),
             }
         else:
-            # Overall community stats
-            community_sizes = {}
-            for user, comm in communities.items():
-                community_sizes[comm] = community_sizes.get(comm, 0) + 1
+            # Overall community stats. Ids are factorized first: GDS community
+            # ids can be arbitrarily large, and bincount needs small codes
+            ids, first, codes = np.unique(
+                labels, return_index=True, return_inverse=True
+            )
+            sizes = np.bincount(codes)
+
+            # Top 5 by size; a stable sort over first-seen order breaks ties
+            # in the order communities first appear
+            by_first = np.argsort(first)
+            top = by_first[np.argsort(-sizes[by_first], kind="stable")[:5]]
 
             return {
-                "total_communities": len(set(communities.values())),
-                "avg_community_size": sum(community_sizes.values())
-                / len(community_sizes),
-                "largest_community_size": max(community_sizes.values()),
-                "community_distribution": dict(
-                    sorted(community_sizes.items(), key=lambda x: x[1], reverse=True)[
-                        :5
-                    ]
-                ),
+                "total_communities": len(ids),
+                "avg_community_size": float(sizes.mean()),
+                "largest_community_size": int(sizes.max()),
+                "community_distribution": {int(ids[i]): int(sizes[i]) for i in top},
             }
 
     def _query_suspicious_patterns(
         self, top_n: int = 10, risk_threshold: float = 0.15
     ) -> Dict[str, Any]:
         """Identify suspicious patterns in the graph."""
-        centrality_df = self.fraud_detector.calculate_centrality_scores()
-        shared_resources = self.fraud_detector.detect_shared_resources()
-        risk_df = self.fraud_detector.compute_risk_scores(
-            centrality_df, shared_resources, self.dataset["transactions"]
-        )
+        shared_resources, risk_df = self._risk_data()
 
         high_risk = risk_df[risk_df["risk_score"] > risk_threshold].head(top_n)
 
@@ -1,9 +1,34 @@
 """Build graph structures from fraud detection data."""
 
-from typing import Dict
+from typing import Dict, Mapping, Tuple, Union
 
 import networkx as nx
+import numpy as np
 import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+# A table as a DataFrame or as column name -> array (see main.py)
+TableLike = Union[pd.DataFrame, Mapping[str, np.ndarray]]
+
+
+def transaction_csr(transactions: TableLike) -> Tuple[np.ndarray, sparse.csr_array]:
+    """Build the completed-transaction network as a sparse adjacency matrix.
+
+    Returns the sorted user ids that appear in completed transactions and an
+    (n, n) CSR matrix whose [i, j] entry is the total amount user i sent to
+    user j, the same weights as FraudGraph.transaction_network's total_amount.
+    """
+    completed = np.asarray(transactions["status"]) == "completed"
+    senders = np.asarray(transactions["sender_id"])[completed]
+    receivers = np.asarray(transactions["receiver_id"])[completed]
+    amounts = np.asarray(transactions["amount"], dtype=np.float64)[completed]
+
+    ids, codes = np.unique(np.concatenate([senders, receivers]), return_inverse=True)
+    rows, cols = codes[: len(senders)], codes[len(senders) :]
+    # Duplicate (sender, receiver) pairs are summed on conversion to CSR
+    adjacency = sparse.csr_array((amounts, (rows, cols)), shape=(len(ids), len(ids)))
+    return ids, adjacency
 
 
 class FraudGraph:
@@ -13,79 +38,99 @@ class FraudGraph:
         """Initialize empty graph."""
         self.G = nx.Graph()
         self.transaction_network = nx.DiGraph()
-
-    def build_from_dataset(self, dataset: Dict[str, pd.DataFrame]) -> None:
-        """Construct graph from dataset components."""
-        users_df = dataset["users"]
-        devices_df = dataset["devices"]
-        user_devices_df = dataset["user_devices"]
-        transactions_df = dataset["transactions"]
-
-        # Add user nodes
-        for _, user in users_df.iterrows():
+        # transaction_csr() of the last built dataset, for scipy.sparse.csgraph;
+        # only build_from_dataset updates it
+        self.transaction_adjacency: Tuple[np.ndarray, sparse.csr_array] = (
+            np.empty(0, dtype=object),
+            sparse.csr_array((0, 0)),
+        )
+        # Results of full-graph scans, keyed by method name
+        self._cache: Dict[str, object] = {}
+
+    def invalidate_cache(self) -> None:
+        """Drop memoized statistics and shared devices.
+
+        build_from_dataset calls this; call it after mutating G or
+        transaction_network directly.
+        """
+        self._cache.clear()
+
+    def build_from_dataset(self, dataset: Dict[str, TableLike]) -> None:
+        """Construct graph from dataset components.
+
+        Each table may be a DataFrame or a dict of column arrays; rows are
+        read by zipping columns rather than with iterrows.
+        """
+        users = dataset["users"]
+        devices = dataset["devices"]
+        user_devices = dataset["user_devices"]
+        transactions = dataset["transactions"]
+
+        self.invalidate_cache()
+        self.transaction_adjacency = transaction_csr(transactions)
+
+        # Add user nodes, and the same users to the transaction network
+        for user_id, is_fraudster, account_age_days, verification_level in zip(
+            users["user_id"],
+            users["is_fraudster"],
+            users["account_age_days"],
+            users["verification_level"],
+        ):
             self.G.add_node(
-                user["user_id"],
+                user_id,
                 node_type="user",
-                is_fraudster=user["is_fraudster"],
-                account_age_days=user["account_age_days"],
-                verification_level=user["verification_level"],
+                is_fraudster=is_fraudster,
+                account_age_days=account_age_days,
+                verification_level=verification_level,
+            )
+            self.transaction_network.add_node(
+                user_id,
+                is_fraudster=is_fraudster,
+                account_age_days=account_age_days,
             )
 
         # Add device nodes
-        for _, device in devices_df.iterrows():
-            self.G.add_node(
-                device["device_id"],
-                node_type="device",
-                device_type=device["device_type"],
-            )
+        for device_id, device_type in zip(devices["device_id"], devices["device_type"]):
+            self.G.add_node(device_id, node_type="device", device_type=device_type)
 
         # Add user-device edges
-        for _, rel in user_devices_df.iterrows():
-            self.G.add_edge(
-                rel["user_id"],
-                rel["device_id"],
-                edge_type="uses_device",
-            )
+        for user_id, device_id in zip(
+            user_devices["user_id"], user_devices["device_id"]
+        ):
+            self.G.add_edge(user_id, device_id, edge_type="uses_device")
 
-        # Build transaction network (directed)
-        for _, user in users_df.iterrows():
-            self.transaction_network.add_node(
-                user["user_id"],
-                is_fraudster=user["is_fraudster"],
-                account_age_days=user["account_age_days"],
+        # Add transaction edges
+        for sender, receiver, amount, timestamp, is_fraudulent, status in zip(
+            transactions["sender_id"],
+            transactions["receiver_id"],
+            transactions["amount"],
+            transactions["timestamp"],
+            transactions["is_fraudulent"],
+            transactions["status"],
+        ):
+            if status != "completed":
+                continue
+
+            # Add to main graph
+            self.G.add_edge(
+                sender,
+                receiver,
+                edge_type="transaction",
+                amount=amount,
+                timestamp=timestamp,
+                is_fraudulent=is_fraudulent,
             )
 
-        # Add transaction edges
-        for _, txn in transactions_df.iterrows():
-            if txn["status"] == "completed":
-                # Add to main graph
-                self.G.add_edge(
-                    txn["sender_id"],
-                    txn["receiver_id"],
-                    edge_type="transaction",
-                    amount=txn["amount"],
-                    timestamp=txn["timestamp"],
-                    is_fraudulent=txn["is_fraudulent"],
+            # Add to transaction network (accumulate amounts)
+            if self.transaction_network.has_edge(sender, receiver):
+                edge = self.transaction_network[sender][receiver]
+                edge["total_amount"] += amount
+                edge["transaction_count"] += 1
+            else:
+                self.transaction_network.add_edge(
+                    sender, receiver, total_amount=amount, transaction_count=1
                 )
 
-                # Add to transaction network (accumulate amounts)
-                if self.transaction_network.has_edge(
-                    txn["sender_id"], txn["receiver_id"]
-                ):
-                    self.transaction_network[txn["sender_id"]][txn["receiver_id"]][
-                        "total_amount"
-                    ] += txn["amount"]
-                    self.transaction_network[txn["sender_id"]][txn["receiver_id"]][
-                        "transaction_count"
-                    ] += 1
-                else:
-                    self.transaction_network.add_edge(
-                        txn["sender_id"],
-                        txn["receiver_id"],
-                        total_amount=txn["amount"],
-                        transaction_count=1,
-                    )
-
     def get_user_subgraph(self, user_id: str, depth: int = 1) -> nx.Graph:
         """Extract subgraph around a specific user."""
         if user_id not in self.G:
@@ -101,7 +146,14 @@ class FraudGraph:
         return self.G.subgraph(nodes).copy()
 
     def get_shared_devices(self) -> Dict[str, list]:
-        """Find devices shared by multiple users."""
+        """Find devices shared by multiple users (memoized until the graph changes)."""
+        if "shared_devices" not in self._cache:
+            self._cache["shared_devices"] = self._find_shared_devices()
+        # Copy the user lists too, so callers cannot mutate the memoized result
+        return {d: list(u) for d, u in self._cache["shared_devices"].items()}
+
+    def _find_shared_devices(self) -> Dict[str, list]:
+        """Map each device used by more than one user to those users."""
         shared = {}
         for node in self.G.nodes():
             if self.G.nodes[node].get("node_type") == "device":
@@ -130,7 +182,10 @@ class FraudGraph:
             return []
 
     def get_statistics(self) -> Dict:
-        """Compute basic graph statistics."""
+        """Compute basic graph statistics (memoized until the graph changes)."""
+        if "statistics" in self._cache:
+            return dict(self._cache["statistics"])
+
         user_nodes = [
             n for n in self.G.nodes() if self.G.nodes[n].get("node_type") == "user"
         ]
@@ -138,7 +193,7 @@ class FraudGraph:
             n for n in self.G.nodes() if self.G.nodes[n].get("node_type") == "device"
         ]
 
-        return {
+        stats = {
             "total_nodes": self.G.number_of_nodes(),
             "total_edges": self.G.number_of_edges(),
             "user_nodes": len(user_nodes),
@@ -148,6 +203,16 @@ class FraudGraph:
                 if self.G.number_of_nodes() > 0
                 else 0
             ),
+            # Counts components without materializing them as node sets
             "connected_components": nx.number_connected_components(self.G),
             "transaction_edges": self.transaction_network.number_of_edges(),
+            # Weakly connected groups of users with completed transactions
+            "transaction_components": csgraph.connected_components(
+                self.transaction_adjacency[1],
+                directed=True,
+                connection="weak",
+                return_labels=False,
+            ),
         }
+        self._cache["statistics"] = stats
+        return dict(stats)
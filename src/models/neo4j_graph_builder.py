@@ -3,6 +3,7 @@
 from typing import Dict
 import pandas as pd
 from neo4j import GraphDatabase
+from neo4j.exceptions import Neo4jError
 import networkx as nx
 
 
@@ -22,6 +23,7 @@ class Neo4jFraudGraph:
         # can operate on a NetworkX graph even when the canonical store is Neo4j.
         self.G = nx.MultiDiGraph()
         self.transaction_network = nx.DiGraph()
+        self._has_gds = None
 
     def _verify_connection(self):
         """Verify Neo4j connection is working."""
@@ -33,18 +35,100 @@ class Neo4jFraudGraph:
         """Close Neo4j driver connection."""
         self.driver.close()
 
+    def has_gds(self) -> bool:
+        """Return whether the server provides the Graph Data Science procedures."""
+        if self._has_gds is None:
+            try:
+                with self.driver.session() as session:
+                    self._has_gds = session.run(
+                        """
+                        SHOW PROCEDURES YIELD name
+                        WHERE name STARTS WITH 'gds.'
+                        RETURN count(name) > 0 AS available
+                        """
+                    ).single()["available"]
+            except Neo4jError:
+                self._has_gds = False
+        return self._has_gds
+
+    @staticmethod
+    def _ensure_projection(session, name: str, relationships) -> None:
+        """Project User/relationships as GDS graph `name` unless it already exists.
+
+        Projections are kept between calls and dropped by clear_database()
+        and build_from_dataset().
+        """
+        exists = session.run(
+            "CALL gds.graph.exists($name) YIELD exists RETURN exists", name=name
+        ).single()["exists"]
+        if not exists:
+            session.run(
+                "CALL gds.graph.project($name, 'User', $relationships)",
+                name=name,
+                relationships=relationships,
+            )
+
+    def _drop_projections(self, session) -> None:
+        """Drop the GDS projections so the next algorithm call re-projects."""
+        if self.has_gds():
+            for name in ("fraudGraph", "transactionGraph"):
+                session.run("CALL gds.graph.drop($name, false)", name=name)
+
     def clear_database(self):
         """Clear all nodes and relationships (use with caution!)."""
         with self.driver.session() as session:
             session.run("MATCH (n) DETACH DELETE n")
+            # Projections of the old data would otherwise be reused
+            self._drop_projections(session)
+        # Reset the in-memory mirror too, so a reused instance does not accumulate edges
+        self.G = nx.MultiDiGraph()
+        self.transaction_network = nx.DiGraph()
+
+    @staticmethod
+    def _run_batched(session, query: str, rows: list, batch_size: int) -> None:
+        """Run an UNWIND $rows query over rows in chunks of batch_size."""
+        for start in range(0, len(rows), batch_size):
+            session.run(query, rows=rows[start : start + batch_size])
+
+    def build_from_dataset(
+        self, dataset: Dict[str, pd.DataFrame], batch_size: int = 1000
+    ) -> None:
+        """Construct graph from dataset components.
 
-    def build_from_dataset(self, dataset: Dict[str, pd.DataFrame]) -> None:
-        """Construct graph from dataset components."""
+        Rows are sent to Neo4j as parameter lists of up to batch_size entries,
+        one UNWIND query per batch.
+        """
         users_df = dataset["users"]
         devices_df = dataset["devices"]
         user_devices_df = dataset["user_devices"]
         transactions_df = dataset["transactions"]
 
+        user_rows = (
+            users_df[
+                ["user_id", "is_fraudster", "account_age_days", "verification_level"]
+            ]
+            .astype({"is_fraudster": bool, "account_age_days": int})
+            .to_dict("records")
+        )
+        device_rows = devices_df[["device_id", "device_type"]].to_dict("records")
+        user_device_rows = user_devices_df[["user_id", "device_id"]].to_dict("records")
+
+        completed = transactions_df[transactions_df["status"] == "completed"]
+        transaction_rows = (
+            completed[
+                [
+                    "sender_id",
+                    "receiver_id",
+                    "transaction_id",
+                    "amount",
+                    "is_fraudulent",
+                ]
+            ]
+            .astype({"amount": float, "is_fraudulent": bool})
+            .assign(timestamp=completed["timestamp"].astype(str).str.replace(" ", "T"))
+            .to_dict("records")
+        )
+
         with self.driver.session() as session:
             # Create constraints and indexes
             session.run(
@@ -58,67 +142,67 @@ class Neo4jFraudGraph:
             )
 
             # Create user nodes
-            for _, user in users_df.iterrows():
-                session.run(
-                    """
-                    CREATE (u:User {
-                        user_id: $user_id,
-                        is_fraudster: $is_fraudster,
-                        account_age_days: $account_age_days,
-                        verification_level: $verification_level
-                    })
-                    """,
-                    user_id=user["user_id"],
-                    is_fraudster=bool(user["is_fraudster"]),
-                    account_age_days=int(user["account_age_days"]),
-                    verification_level=user["verification_level"],
-                )
+            self._run_batched(
+                session,
+                """
+                UNWIND $rows AS r
+                CREATE (u:User {
+                    user_id: r.user_id,
+                    is_fraudster: r.is_fraudster,
+                    account_age_days: r.account_age_days,
+                    verification_level: r.verification_level
+                })
+                """,
+                user_rows,
+                batch_size,
+            )
 
             # Create device nodes
-            for _, device in devices_df.iterrows():
-                session.run(
-                    """
-                    CREATE (d:Device {
-                        device_id: $device_id,
-                        device_type: $device_type
-                    })
-                    """,
-                    device_id=device["device_id"],
-                    device_type=device["device_type"],
-                )
+            self._run_batched(
+                session,
+                """
+                UNWIND $rows AS r
+                CREATE (d:Device {
+                    device_id: r.device_id,
+                    device_type: r.device_type
+                })
+                """,
+                device_rows,
+                batch_size,
+            )
 
             # Create user-device relationships
-            for _, rel in user_devices_df.iterrows():
-                session.run(
-                    """
-                    MATCH (u:User {user_id: $user_id})
-                    MATCH (d:Device {device_id: $device_id})
-                    CREATE (u)-[:USES_DEVICE]->(d)
-                    """,
-                    user_id=rel["user_id"],
-                    device_id=rel["device_id"],
-                )
+            self._run_batched(
+                session,
+                """
+                UNWIND $rows AS r
+                MATCH (u:User {user_id: r.user_id})
+                MATCH (d:Device {device_id: r.device_id})
+                CREATE (u)-[:USES_DEVICE]->(d)
+                """,
+                user_device_rows,
+                batch_size,
+            )
 
             # Create transaction relationships
-            for _, txn in transactions_df.iterrows():
-                if txn["status"] == "completed":
-                    session.run(
-                        """
-                        MATCH (sender:User {user_id: $sender_id})
-                        MATCH (receiver:User {user_id: $receiver_id})
-                        MERGE (sender)-[t:TRANSACTED {transaction_id: $transaction_id}]->(receiver)
-                        ON CREATE SET
-                            t.amount = $amount,
-                            t.timestamp = datetime($timestamp),
-                            t.is_fraudulent = $is_fraudulent
-                        """,
-                        sender_id=txn["sender_id"],
-                        receiver_id=txn["receiver_id"],
-                        transaction_id=txn["transaction_id"],
-                        amount=float(txn["amount"]),
-                        timestamp=str(txn["timestamp"]).replace(" ", "T"),
-                        is_fraudulent=bool(txn["is_fraudulent"]),
-                    )
+            self._run_batched(
+                session,
+                """
+                UNWIND $rows AS r
+                MATCH (sender:User {user_id: r.sender_id})
+                MATCH (receiver:User {user_id: r.receiver_id})
+                MERGE (sender)-[t:TRANSACTED {transaction_id: r.transaction_id}]->(receiver)
+                ON CREATE SET
+                    t.amount = r.amount,
+                    t.timestamp = datetime(r.timestamp),
+                    t.is_fraudulent = r.is_fraudulent
+                """,
+                transaction_rows,
+                batch_size,
+            )
+
+            # Projections made before this build do not include the new data
+            self._drop_projections(session)
 
         # Also build an in-memory NetworkX graph mirror for algorithms that expect NetworkX
         # User nodes
@@ -240,17 +324,9 @@ class Neo4jFraudGraph:
     def run_community_detection(self) -> Dict[str, int]:
         """Run Louvain community detection using Graph Data Science library."""
         with self.driver.session() as session:
-            # Create in-memory projection
-            session.run(
-                """
-                CALL gds.graph.project(
-                    'fraudGraph',
-                    'User',
-                    {
-                        TRANSACTED: {orientation: 'UNDIRECTED'}
-                    }
-                )
-                """
+            # Create (or reuse) in-memory projection
+            self._ensure_projection(
+                session, "fraudGraph", {"TRANSACTED": {"orientation": "UNDIRECTED"}}
             )
 
             # Run Louvain
@@ -262,28 +338,13 @@ class Neo4jFraudGraph:
                 """
             )
 
-            communities = {
-                record["user_id"]: record["communityId"] for record in result
-            }
-
-            # Drop projection
-            session.run("CALL gds.graph.drop('fraudGraph')")
-
-            return communities
+            return {record["user_id"]: record["communityId"] for record in result}
 
     def calculate_pagerank(self) -> pd.DataFrame:
         """Calculate PageRank using Graph Data Science library."""
         with self.driver.session() as session:
-            # Create projection
-            session.run(
-                """
-                CALL gds.graph.project(
-                    'transactionGraph',
-                    'User',
-                    'TRANSACTED'
-                )
-                """
-            )
+            # Create (or reuse) projection
+            self._ensure_projection(session, "transactionGraph", "TRANSACTED")
 
             # Run PageRank
             result = session.run(
@@ -306,9 +367,6 @@ class Neo4jFraudGraph:
                 for r in result
             ]
 
-            # Drop projection
-            session.run("CALL gds.graph.drop('transactionGraph')")
-
             return pd.DataFrame(data)
 
     def load_networkx_from_neo4j(self) -> None:
@@ -0,0 +1,32 @@
+"""Unit tests for array-level aggregations."""
+
+import numpy as np
+
+from src.data.aggregations import count_device_fraudsters, crosstab_code_flag
+
+
+class TestCountDeviceFraudsters:
+    """Test per-device user and fraudster counts."""
+
+    def test_counts_per_device(self):
+        """Test users and fraudsters are counted per device code."""
+        device_codes = np.array([0, 0, 1, 2, 2, 2])
+        is_fraud = np.array([True, False, False, True, True, False])
+
+        user_count, fraudsters = count_device_fraudsters(device_codes, is_fraud, 4)
+
+        assert user_count.tolist() == [2, 1, 3, 0]
+        assert fraudsters.tolist() == [1, 0, 2, 0]
+
+
+class TestCrosstabCodeFlag:
+    """Test (code, flag) crosstab counts."""
+
+    def test_counts_per_code_and_flag(self):
+        """Test each code row splits its count by flag."""
+        codes = np.array([0, 1, 1, 2, 0, 1], dtype=np.int8)
+        flags = np.array([True, False, True, False, False, False])
+
+        table = crosstab_code_flag(codes, flags, 3)
+
+        assert table.tolist() == [[1, 1], [2, 1], [1, 0]]
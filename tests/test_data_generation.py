@@ -1,5 +1,6 @@
 """Unit tests for synthetic data generation."""
 
+import pandas as pd
 import pytest
 from src.data.generate_dataset import FraudDatasetGenerator
 
@@ -143,3 +144,10 @@ class TestFraudDatasetGenerator:
         dataset = generator.generate_dataset(n_users=100, n_transactions=n_transactions)
 
         assert len(dataset["transactions"]) == n_transactions
+
+    def test_transactions_need_two_normal_users(self, generator):
+        """Test a clear error when there are too few normal users to transact."""
+        users_df = pd.DataFrame({"user_id": ["U1", "U2"], "is_fraudster": [True, False]})
+
+        with pytest.raises(ValueError, match="at least 2 non-fraudster users"):
+            generator.generate_transactions(users_df, n_transactions=10)
@@ -1,10 +1,12 @@
 """Unit tests for fraud detection algorithms."""
 
-import pytest
+import networkx as nx
 import pandas as pd
+import pytest
+
 from src.data.generate_dataset import FraudDatasetGenerator
-from src.models.graph_builder import FraudGraph
 from src.models.fraud_detector import FraudDetector
+from src.models.graph_builder import FraudGraph
 
 
 class TestFraudDetector:
@@ -33,6 +35,71 @@ class TestFraudDetector:
         detector = FraudDetector(graph)
         assert detector.fraud_graph == graph
 
+    def test_missing_backend_falls_back_to_networkx(self, graph, detector):
+        """Test an uninstalled NetworkX backend gives the default results."""
+        fallback = FraudDetector(graph, backend="not-installed")
+
+        # Louvain is randomized, so only compare which users were assigned
+        assert (
+            fallback.detect_communities().keys() == detector.detect_communities().keys()
+        )
+        pd.testing.assert_frame_equal(
+            fallback.calculate_centrality_scores(),
+            detector.calculate_centrality_scores(),
+        )
+
+    def test_sampled_betweenness_matches_exact_when_k_covers_graph(
+        self, graph, detector
+    ):
+        """Test betweenness_k >= n_nodes gives exact betweenness."""
+        n_nodes = graph.transaction_network.number_of_nodes()
+        exact = nx.betweenness_centrality(graph.transaction_network)
+
+        scores = detector.calculate_centrality_scores(betweenness_k=n_nodes)
+
+        assert scores["betweenness"].tolist() == [
+            exact[uid] for uid in scores["user_id"]
+        ]
+
+    def test_igraph_backend_matches_networkx_centrality(self, graph, detector):
+        """Test igraph PageRank and betweenness match NetworkX's values."""
+        pytest.importorskip("igraph")
+        n_nodes = graph.transaction_network.number_of_nodes()
+
+        expected = detector.calculate_centrality_scores(betweenness_k=n_nodes)
+        scores = FraudDetector(graph, backend="igraph").calculate_centrality_scores()
+
+        # NetworkX stops PageRank's power iteration at a 1e-6 total tolerance
+        pd.testing.assert_frame_equal(scores, expected, rtol=1e-3)
+
+    def test_gds_graph_runs_louvain_and_pagerank(self, graph):
+        """Test Louvain and PageRank come from a GDS-capable graph."""
+        user_ids = list(graph.transaction_network.nodes())
+
+        class FakeGDSGraph:
+            def has_gds(self):
+                return True
+
+            def run_community_detection(self):
+                return {uid: 7 for uid in user_ids}
+
+            def calculate_pagerank(self):
+                return pd.DataFrame({"user_id": user_ids, "pagerank": 0.5})
+
+        detector = FraudDetector(graph, gds_graph=FakeGDSGraph())
+
+        assert set(detector.detect_communities().values()) == {7}
+        assert (detector.calculate_centrality_scores()["pagerank"] == 0.5).all()
+
+    def test_gds_is_opt_in(self, graph):
+        """Test a GDS-capable fraud_graph alone does not switch to GDS."""
+        graph.has_gds = lambda: True
+        graph.run_community_detection = lambda: pytest.fail("GDS Louvain used")
+
+        detector = FraudDetector(graph)
+
+        assert detector.detect_communities()
+
     def test_generate_fraud_report(self, detector, dataset):
         """Test fraud report generation."""
         report = detector.generate_fraud_report(
@@ -1,8 +1,10 @@
 """Unit tests for graph construction."""
 
+import networkx as nx
+import numpy as np
 import pytest
 from src.data.generate_dataset import FraudDatasetGenerator
-from src.models.graph_builder import FraudGraph
+from src.models.graph_builder import FraudGraph, transaction_csr
 
 
 class TestFraudGraph:
@@ -110,6 +112,17 @@ class TestFraudGraph:
         # Should be a dict
         assert isinstance(shared, dict)
 
+    def test_shared_devices_cache_not_mutated_by_callers(self):
+        """Test mutating a returned user list leaves the memoized result intact."""
+        graph = FraudGraph()
+        graph.G.add_node("D1", node_type="device")
+        graph.G.add_nodes_from(["U1", "U2"], node_type="user")
+        graph.G.add_edges_from([("U1", "D1"), ("U2", "D1")])
+
+        graph.get_shared_devices()["D1"].append("INTRUDER")
+
+        assert sorted(graph.get_shared_devices()["D1"]) == ["U1", "U2"]
+
     def test_get_transaction_paths(self, graph, dataset):
         """Test finding paths between users."""
         users = dataset["users"]["user_id"].head(2).tolist()
@@ -125,3 +138,34 @@ class TestFraudGraph:
         required_keys = ["total_nodes", "total_edges", "user_nodes", "device_nodes"]
         for key in required_keys:
             assert key in stats
+
+    def test_statistics_cached_until_invalidated(self, graph):
+        """Test statistics are memoized and recomputed after invalidation."""
+        stats = graph.get_statistics()
+        graph.G.add_node("D_NEW", node_type="device")
+
+        assert graph.get_statistics() == stats
+
+        graph.invalidate_cache()
+        assert graph.get_statistics()["device_nodes"] == stats["device_nodes"] + 1
+
+    def test_transaction_csr_matches_transaction_network(self, graph, dataset):
+        """Test the CSR adjacency holds the transaction network's total amounts."""
+        ids, adjacency = transaction_csr(dataset["transactions"])
+        expected = nx.to_scipy_sparse_array(
+            graph.transaction_network, nodelist=ids.tolist(), weight="total_amount"
+        )
+
+        assert adjacency.shape == (len(ids), len(ids))
+        np.testing.assert_allclose(adjacency.toarray(), expected.toarray())
+
+    def test_transaction_components_counted_on_csr(self, graph):
+        """Test csgraph component counts match NetworkX on transacting users."""
+        network = graph.transaction_network
+        active = network.subgraph(n for n, d in network.degree() if d > 0)
+
+        stats = graph.get_statistics()
+
+        assert stats["transaction_components"] == (
+            nx.number_weakly_connected_components(active)
+        )
@@ -98,6 +98,19 @@ class TestGraphRAG:
 
         assert result is not None
 
+    def test_community_info_with_large_community_ids(self, graph_rag, dataset):
+        """Test overall community stats with GDS-style large community ids."""
+        users = dataset["users"]["user_id"].tolist()
+        big = 2**40
+        graph_rag.fraud_detector.detect_communities = lambda: {
+            u: big + (i % 3) for i, u in enumerate(users)
+        }
+
+        result = graph_rag.query("community_info")
+
+        assert result["total_communities"] == 3
+        assert result["community_distribution"] == {big: 17, big + 1: 17, big + 2: 16}
+
     def test_suspicious_patterns_query(self, graph_rag):
         """Test suspicious patterns query."""
         result = graph_rag.query("suspicious_patterns", top_n=5)
@@ -105,6 +118,22 @@ class TestGraphRAG:
         assert result is not None
         assert "high_risk_users" in result
 
+    def test_risk_scores_cached_until_invalidated(self, graph_rag, dataset):
+        """Test risk queries reuse one centrality run until invalidation."""
+        detector = graph_rag.fraud_detector
+        calls = []
+        compute = detector.calculate_centrality_scores
+        detector.calculate_centrality_scores = lambda: calls.append(1) or compute()
+
+        user_id = dataset["users"]["user_id"].iloc[0]
+        graph_rag.query("fraud_risk", user_id=user_id)
+        graph_rag.query("suspicious_patterns")
+        assert len(calls) == 1
+
+        graph_rag.invalidate_cache()
+        graph_rag.query("fraud_risk", user_id=user_id)
+        assert len(calls) == 2
+
     def test_invalid_query_type(self, graph_rag):
         """Test invalid query type returns error."""
         result = graph_rag.query("invalid_query_type")